@@ -15,3 +15,23 @@ class StartOlderThanEnd(Exception):
     """
     Exception raised when the start date is older than the end date
     """
+
+
+class RequestError(Exception):
+    """
+    Exception raised when a request to the booking service can not be done,
+    its message is sent back to the client
+    """
+
+
+class BookingError(Exception):
+    """
+    Exception raised when a client can not make a booking,
+    its message gives the reason
+    """
+
+
+class DateTaken(BookingError):
+    """
+    Exception raised when the chosen date is not free
+    """
@@ -0,0 +1,193 @@
+"""
+Recruitment Task
+This script holds a container of all bookings
+which keeps the schedule index up to date
+Author: Piotr Wołoszyk
+"""
+
+from scheduleindex import ScheduleIndex
+
+
+class BookingList():
+    """
+    Container of the bookings, a reservation can be removed without
+    scanning or shifting the other ones
+    Attributes:
+        reservations : <dict>
+            all reservations in the order they were added
+        index : <ScheduleIndex>
+            index of the reservations in the container
+    Methods:
+        append():
+            Add a reservation
+        extend():
+            Add many reservations at once
+        remove():
+            Remove a reservation
+        find():
+            Find the client's reservation starting at a date
+        contains():
+            Check if the reservation is already on the list
+        week_count():
+            Count the client's reservations in the week of a date
+        next_free():
+            Find the first free date with a window of the given length
+        free_window():
+            Check if a date is free and how long will be
+        free_windows():
+            Find the next free windows of at least the given length
+        between():
+            Return reservations starting in a range of dates
+        first_start():
+            Return the start date of the first reservation
+        last_end():
+            Return the end date of the reservation that ends last
+    """
+
+    def __init__(self, reservations=()):
+        self.reservations = {}
+        self.index = ScheduleIndex()
+        self.extend(reservations)
+
+    def __len__(self):
+        return len(self.reservations)
+
+    def __iter__(self):
+        return iter(self.reservations.values())
+
+    def append(self, reservation):
+        """
+        Add a reservation
+        Args:
+            <ClientReservation> reservation - reservation to add
+        """
+        self.reservations[id(reservation)] = reservation
+        self.index.add(reservation)
+
+    def extend(self, reservations):
+        """
+        Add many reservations at once
+        Args:
+            <list> reservations - list of ClientReservation objects
+        """
+        reservations = list(reservations)
+        for reservation in reservations:
+            self.reservations[id(reservation)] = reservation
+        # sorting once is faster than inserting many reservations one by one
+        if len(reservations) * 8 > len(self.reservations):
+            self.index.rebuild(self.reservations.values())
+        else:
+            for reservation in reservations:
+                self.index.add(reservation)
+
+    def remove(self, reservation):
+        """
+        Remove a reservation
+        Args:
+            <ClientReservation> reservation - reservation to remove
+        """
+        if id(reservation) not in self.reservations:
+            # the same booking stored as another object
+            reservation = self.index.find(reservation.name,
+                                          reservation.start_date)
+            if reservation is None:
+                raise ValueError('reservation is not in the list')
+        del self.reservations[id(reservation)]
+        self.index.remove(reservation)
+
+    def find(self, name, start_date):
+        """
+        Find the client's reservation starting at a date
+        Args:
+            <string> name - client's name
+            <datetime> start_date - reservation start date
+        Return <ClientReservation>:
+            found reservation or None
+        """
+        return self.index.find(name, start_date)
+
+    def contains(self, name, start_date, end_date):
+        """
+        Check if the reservation is already on the list
+        Args:
+            <string> name - client's name
+            <datetime> start_date - reservation start date
+            <datetime> end_date - reservation end date
+        Return <bool>
+        """
+        return self.index.contains(name, start_date, end_date)
+
+    def week_count(self, name, date):
+        """
+        Count the client's reservations in the week of a date
+        Args:
+            <string> name - client's name
+            <datetime> date - any date in the week
+        Return <int>
+        """
+        return self.index.week_count(name, date)
+
+    def next_free(self, date, minutes):
+        """
+        Find the first free date with a window of the given length
+        Args:
+            <datetime> date - the earliest date to check
+            <int> minutes - length of the window
+        Return <datetime>
+        """
+        date, _ = self.index.next_free(date, minutes)
+        return date
+
+    def free_window(self, date):
+        """
+        Check if a date is free and how long will be
+        Args:
+            <datetime> date - date provided by the client
+        Return:
+            1)<datetime>
+                first date with at least 0,5h free
+            2)<int>
+                2, 1 or 0 if court will be available for 1,5h, 1h or 0,5h
+        """
+        return self.index.free_window(date)
+
+    def free_windows(self, date, minutes, count):
+        """
+        Find the next free windows of at least the given length
+        Args:
+            <datetime> date - the earliest date to check
+            <int> minutes - the shortest window
+            <int> count - the largest number of windows
+        Return <list>:
+            (start, end) dates of every window, end is None
+            when the court is free from start on
+        """
+        return self.index.free_windows(date, minutes, count)
+
+    def between(self, start_date=None, end_date=None):
+        """
+        Return reservations starting in a range of dates
+        Args:
+            <datetime> start_date - the earliest start, None for no limit
+            <datetime> end_date - reservations start before it,
+                None for no limit
+        Return <list>:
+            reservations sorted by start date
+        """
+        return self.index.between(start_date, end_date)
+
+    def first_start(self):
+        """
+        Return the start date of the first reservation
+        Return <datetime>:
+            start date, None if the list is empty
+        """
+        return self.index.first_start()
+
+    def last_end(self):
+        """
+        Return the end date of the reservation that ends last
+        Return <datetime>:
+            end date, None if the list is empty
+        """
+        return self.index.last_end()
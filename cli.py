@@ -0,0 +1,230 @@
+"""
+Recruitment Task
+This script handles tennis court bookings from the command line
+without the menu, many operations can be read from the standard input
+Author: Piotr Wołoszyk
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import sys
+
+from consts import FREE_WINDOWS
+from dateformat import DATE_TIME_FORMAT, parse_date_time
+from schedule import Schedule
+from service import EXPORT_FORMATS, LENGTHS, BookingService
+
+# names of the request fields in the columns of a csv batch by operation
+CSV_FIELDS = {'make': ('name', 'start', 'minutes', 'court'),
+              'cancel': ('name', 'start'),
+              'list': ('start', 'end'),
+              'export': ('start', 'end', 'format')}
+OPERATIONS = {'book': 'make'}  # commands named other than the requests
+CHANGES = ('book', 'cancel', 'import', 'batch')  # commands changing data
+
+
+def log(message):
+    """
+    Print a message about the loaded files, it does not mix with the output
+    Args:
+        <string> message - message to print
+    """
+    print(message, file=sys.stderr)
+
+
+def build_parser():
+    """
+    Build the parser of the command line arguments
+    Return <ArgumentParser>
+    """
+    parser = argparse.ArgumentParser(
+        prog='main.py',
+        description='Tennis court bookings, run without arguments '
+                    'for the menu')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    book = commands.add_parser('book', help='make a reservation')
+    book.add_argument('name', help='first name and surname')
+    book.add_argument('start', help='DD.MM.YYYY HH:MM')
+    book.add_argument('--minutes', type=int, default=60, choices=LENGTHS)
+    book.add_argument('--court', type=int,
+                      help='number of the court, the first free by default')
+
+    cancel = commands.add_parser('cancel', help='cancel a reservation')
+    cancel.add_argument('name', help='first name and surname')
+    cancel.add_argument('start', help='DD.MM.YYYY HH:MM')
+
+    export = commands.add_parser(
+        'export', help='write reservations starting between two days')
+    export.add_argument('start', help='DD.MM.YYYY')
+    export.add_argument('end', help='DD.MM.YYYY')
+    export.add_argument('--format', default='csv',
+                        choices=['csv', *EXPORT_FORMATS])
+    export.add_argument('--output', help='file to write, standard output '
+                                         'by default')
+
+    load = commands.add_parser('import', help='add reservations from files')
+    load.add_argument('paths', nargs='+', help='csv or json files')
+
+    free = commands.add_parser('free-slots',
+                               help='list the next free windows')
+    free.add_argument('start', help='DD.MM.YYYY HH:MM')
+    free.add_argument('--minutes', type=int, default=30,
+                      help='the shortest window')
+    free.add_argument('--count', type=int, default=FREE_WINDOWS)
+    free.add_argument('--court', type=int, default=1)
+
+    batch = commands.add_parser(
+        'batch', help='apply operations read from the standard input')
+    batch.add_argument(
+        '--format', default='ndjson', choices=['csv', 'ndjson'],
+        help='csv rows start with the operation followed by its fields, '
+             'json lines are requests of the booking service')
+    return parser
+
+
+def read_batch(lines, batch_format):
+    """
+    Read requests of a batch
+    Args:
+        <iterable> lines - lines of the standard input
+        <string> batch_format - 'csv' or 'ndjson'
+    Yield <dict>:
+        request for the booking service, a string with an error message
+        when the line is wrong
+    """
+    if batch_format == 'ndjson':
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as error:
+                yield f'bad request: {error}'
+                continue
+            if not isinstance(request, dict):
+                # run_batch takes every string for an error message
+                yield ('bad request: expected an object, got '
+                       f'{type(request).__name__}')
+                continue
+            request['op'] = OPERATIONS.get(request.get('op'),
+                                           request.get('op'))
+            yield request
+        return
+    for row in csv.reader(lines, skipinitialspace=True):
+        if not row:
+            continue
+        operation = OPERATIONS.get(row[0].strip(), row[0].strip())
+        fields = CSV_FIELDS.get(operation)
+        if fields is None:
+            yield f'bad request: unknown operation {row[0]}'
+            continue
+        yield {'op': operation,
+               **{field: value.strip()
+                  for field, value in zip(fields, row[1:]) if value.strip()}}
+
+
+async def run_batch(service, requests, output):
+    """
+    Answer requests of a batch one by one
+    Args:
+        <BookingService> service - service answering the requests
+        <iterable> requests - requests or error messages
+        <file> output - file to write json answers to
+    Return <int>:
+        number of failed requests
+    """
+    failed = 0
+    for request in requests:
+        if isinstance(request, str):
+            answer = {'ok': False, 'error': request}
+        else:
+            answer = await service.handle(request)
+        failed += not answer['ok']
+        output.write(json.dumps(answer, ensure_ascii=False) + '\n')
+    return failed
+
+
+def run_command(sch, args):
+    """
+    Run one command on a loaded schedule
+    Args:
+        <Schedule> sch - schedule with all reservations
+        <Namespace> args - parsed arguments
+    Return <int>:
+        exit status
+    """
+    service = BookingService(sch)
+    if args.command == 'batch':
+        failed = asyncio.run(run_batch(
+            service, read_batch(sys.stdin, args.format), sys.stdout))
+        return 1 if failed else 0
+    if args.command == 'import':
+        failed = []  # files which were not read completely
+        for path in args.paths:
+            sch.load_file(path, log=log, failed=failed)
+        return 1 if failed else 0
+    if args.command == 'free-slots':
+        try:
+            date = parse_date_time(args.start)
+        except ValueError as error:
+            print(f'! {error} !', file=sys.stderr)
+            return 1
+        for free_start, free_end in sch.free_windows(date, args.minutes,
+                                                     args.count, args.court):
+            free_until = '' if free_end is None\
+                else f' to {free_end.strftime(DATE_TIME_FORMAT)}'
+            print(f'from {free_start.strftime(DATE_TIME_FORMAT)}'
+                  f'{free_until}')
+        return 0
+    request = {'op': OPERATIONS.get(args.command, args.command),
+               'name': getattr(args, 'name', None),
+               'start': args.start,
+               'end': getattr(args, 'end', None),
+               'minutes': getattr(args, 'minutes', None),
+               'court': getattr(args, 'court', None),
+               'format': getattr(args, 'format', None)}
+    answer = asyncio.run(service.handle(
+        {key: value for key, value in request.items() if value is not None}))
+    if not answer['ok']:
+        print(f'! {answer["error"]} !', file=sys.stderr)
+        return 1
+    if args.command == 'book':
+        print(f'Reservation has been made on court {answer["court"]}')
+    elif args.command == 'cancel':
+        print('Reservations have been cancelled!')
+    elif args.output is None:
+        sys.stdout.write(answer['data'])
+    else:
+        with open(args.output, 'w', newline='', encoding='UTF-8') as file:
+            file.write(answer['data'])
+    return 0
+
+
+def main(argv=None):
+    """
+    Load the schedule once and run the command given in the arguments
+    Args:
+        <list> argv - command line arguments without the program name
+    Return <int>:
+        exit status
+    """
+    args = build_parser().parse_args(argv)
+    path_to_file = 'schedule'  # path to folder with csv and json file
+    sch = Schedule()
+    sch.load_folder(path_to_file, log=log)
+    # changes made after the last backup
+    sch.open_journal(f'{path_to_file}/session.journal')
+    try:
+        return run_command(sch, args)
+    finally:
+        if args.command in CHANGES:
+            sch.make_backup()
+        if sch.journal is not None:
+            sch.journal.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
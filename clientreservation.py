@@ -1,5 +1,6 @@
 from dataclasses import dataclass
-import datetime
+from datetime import datetime
+from functools import total_ordering
 """
 Recruitment Task
 This script holds a class containing client data
@@ -7,10 +8,12 @@ Author: Piotr Wołoszyk
 """
 
 
-@dataclass
+@total_ordering
+@dataclass(frozen=True, slots=True)
 class ClientReservation():
     """
 A dataclass to store the client's booking information
+Reservations are immutable and hashable, they are sorted by start date
     Attributes:
         name : <string>
             first and last name of client
@@ -18,7 +21,16 @@ A dataclass to store the client's booking information
             Reservation start date and time
         end_time: <datetime>
             Reservation end date and time
+        court: <int>
+            number of the booked court, the first court is 1
     """
     name: str
     start_date: datetime
     end_date: datetime
+    court: int = 1
+
+    def __lt__(self, other):
+        if not isinstance(other, ClientReservation):
+            return NotImplemented
+        return (self.start_date, self.end_date, self.name, self.court)\
+            < (other.start_date, other.end_date, other.name, other.court)
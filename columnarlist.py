@@ -0,0 +1,344 @@
+"""
+Recruitment Task
+This script holds a compact container of the bookings
+which keeps dates as numbers in typed arrays
+Author: Piotr Wołoszyk
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+from clientreservation import ClientReservation
+from dateformat import from_minutes, to_minutes
+from scheduleindex import find_free, find_free_windows, window_size
+
+
+class ColumnarBookingList():
+    """
+    Compact container of the bookings, it has the same methods
+    as BookingList but keeps every column in a typed array
+    sorted by start date, reservations are created when needed
+    Attributes:
+        starts : <array>
+            start dates in minutes from 1970 in ascending order
+        ends : <array>
+            end dates in minutes from 1970, ends[i] belongs to starts[i]
+        name_ids : <array>
+            position of the client's name in names
+        names : <list>
+            every client's name stored once
+        longest : <int>
+            the longest reservation ever added in minutes
+        court : <int>
+            number of the court all reservations are made for
+    Methods:
+        append():
+            Add a reservation
+        extend():
+            Add many reservations at once
+        remove():
+            Remove a reservation
+        find():
+            Find the client's reservation starting at a date
+        contains():
+            Check if the reservation is already on the list
+        week_count():
+            Count the client's reservations in the week of a date
+        next_free():
+            Find the first free date with a window of the given length
+        free_window():
+            Check if a date is free and how long will be
+        free_windows():
+            Find the next free windows of at least the given length
+        between():
+            Return reservations starting in a range of dates
+        first_start():
+            Return the start date of the first reservation
+        last_end():
+            Return the end date of the reservation that ends last
+    """
+
+    def __init__(self, reservations=(), court=1):
+        self.court = court
+        self.starts = array('q')
+        self.ends = array('q')
+        self.name_ids = array('i')
+        self.names = []
+        self._name_ids = {}  # position of each name in names
+        self.longest = 0
+        self.extend(reservations)
+
+    @classmethod
+    def from_columns(cls, starts, ends, name_ids, names, longest, court=1):
+        """
+        Create the container from columns sorted by start date
+        Args:
+            <array> starts - start dates in minutes
+            <array> ends - end dates in minutes
+            <array> name_ids - position of the client's name in names
+            <list> names - every client's name stored once
+            <int> longest - the longest reservation in minutes
+            <int> court - number of the court
+        Return <ColumnarBookingList>
+        """
+        booking_list = cls(court=court)
+        booking_list.starts = starts
+        booking_list.ends = ends
+        booking_list.name_ids = name_ids
+        booking_list.names = names
+        booking_list._name_ids = {name: name_id
+                                  for name_id, name in enumerate(names)}
+        booking_list.longest = longest
+        return booking_list
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        for position in range(len(self.starts)):
+            yield self._reservation(position)
+
+    def _reservation(self, position):
+        """
+        Create the reservation stored at a position
+        Args:
+            <int> position - position in the arrays
+        Return <ClientReservation>
+        """
+        return ClientReservation(self.names[self.name_ids[position]],
+                                 from_minutes(self.starts[position]),
+                                 from_minutes(self.ends[position]),
+                                 self.court)
+
+    def _name_id(self, name):
+        """
+        Return the position of a name in names, add it if it is new
+        Args:
+            <string> name - client's name
+        Return <int>
+        """
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def _position(self, name, start_date, end_date=None):
+        """
+        Find the position of the client's reservation
+        Args:
+            <string> name - client's name
+            <datetime> start_date - reservation start date
+            <datetime> end_date - reservation end date, any if None
+        Return <int>:
+            position in the arrays or -1
+        """
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            return -1
+        start = to_minutes(start_date)
+        end = None if end_date is None else to_minutes(end_date)
+        position = bisect_left(self.starts, start)
+        while position < len(self.starts) and self.starts[position] == start:
+            if self.name_ids[position] == name_id\
+                    and end in (None, self.ends[position]):
+                return position
+            position += 1
+        return -1
+
+    def append(self, reservation):
+        """
+        Add a reservation
+        Args:
+            <ClientReservation> reservation - reservation to add
+        """
+        start = to_minutes(reservation.start_date)
+        end = to_minutes(reservation.end_date)
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.name_ids.insert(position, self._name_id(reservation.name))
+        self.longest = max(self.longest, end - start)
+
+    def extend(self, reservations):
+        """
+        Add many reservations at once
+        Args:
+            <list> reservations - list of ClientReservation objects
+        """
+        if isinstance(reservations, ColumnarBookingList) and not self.names:
+            # columns of another container are copied at once
+            self.starts = reservations.starts[:]
+            self.ends = reservations.ends[:]
+            self.name_ids = reservations.name_ids[:]
+            self.names = reservations.names[:]
+            self._name_ids = dict(reservations._name_ids)
+            self.longest = reservations.longest
+            return
+        reservations = list(reservations)
+        # sorting once is faster than inserting many reservations one by one
+        if len(reservations) * 8 <= len(self.starts):
+            for reservation in reservations:
+                self.append(reservation)
+            return
+        rows = [(to_minutes(reservation.start_date),
+                 to_minutes(reservation.end_date),
+                 self._name_id(reservation.name))
+                for reservation in reservations]
+        rows.extend(zip(self.starts, self.ends, self.name_ids))
+        rows.sort(key=lambda row: row[0])
+        self.starts = array('q', (start for start, _, _ in rows))
+        self.ends = array('q', (end for _, end, _ in rows))
+        self.name_ids = array('i', (name_id for _, _, name_id in rows))
+        self.longest = max((end - start for start, end, _ in rows),
+                           default=0)
+
+    def remove(self, reservation):
+        """
+        Remove a reservation
+        Args:
+            <ClientReservation> reservation - reservation to remove
+        """
+        position = self._position(reservation.name,
+                                  reservation.start_date,
+                                  reservation.end_date)
+        if position == -1:
+            raise ValueError('reservation is not in the list')
+        del self.starts[position]
+        del self.ends[position]
+        del self.name_ids[position]
+
+    def find(self, name, start_date):
+        """
+        Find the client's reservation starting at a date
+        Args:
+            <string> name - client's name
+            <datetime> start_date - reservation start date
+        Return <ClientReservation>:
+            found reservation or None
+        """
+        position = self._position(name, start_date)
+        if position == -1:
+            return None
+        return self._reservation(position)
+
+    def contains(self, name, start_date, end_date):
+        """
+        Check if the reservation is already on the list
+        Args:
+            <string> name - client's name
+            <datetime> start_date - reservation start date
+            <datetime> end_date - reservation end date
+        Return <bool>
+        """
+        return self._position(name, start_date, end_date) != -1
+
+    def week_count(self, name, date):
+        """
+        Count the client's reservations in the week of a date
+        Args:
+            <string> name - client's name
+            <datetime> date - any date in the week
+        Return <int>
+        """
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            return 0
+        monday = datetime.combine(
+            date.date() - timedelta(days=date.weekday()), datetime.min.time())
+        first = bisect_left(self.starts, to_minutes(monday))
+        last = bisect_left(self.starts,
+                           to_minutes(monday + timedelta(days=7)))
+        return self.name_ids[first:last].count(name_id)
+
+    def next_free(self, date, minutes):
+        """
+        Find the first free date with a window of the given length
+        Args:
+            <datetime> date - the earliest date to check
+            <int> minutes - length of the window
+        Return <datetime>
+        """
+        start = to_minutes(date)
+        free, _ = find_free(self.starts, self.ends, self.longest,
+                            start, minutes)
+        if free == start:
+            return date
+        return from_minutes(free)
+
+    def free_window(self, date):
+        """
+        Check if a date is free and how long will be
+        Args:
+            <datetime> date - date provided by the client
+        Return:
+            1)<datetime>
+                first date with at least 0,5h free
+            2)<int>
+                2, 1 or 0 if court will be available for 1,5h, 1h or 0,5h
+        """
+        start = to_minutes(date)
+        free, position = find_free(self.starts, self.ends, self.longest,
+                                   start, 30)
+        if free != start:
+            date = from_minutes(free)
+        if position == len(self.starts):
+            return date, 2
+        return date, window_size(self.starts[position] - free, 1)
+
+    def free_windows(self, date, minutes, count):
+        """
+        Find the next free windows of at least the given length
+        Args:
+            <datetime> date - the earliest date to check
+            <int> minutes - the shortest window
+            <int> count - the largest number of windows
+        Return <list>:
+            (start, end) dates of every window, end is None
+            when the court is free from start on
+        """
+        windows = find_free_windows(self.starts, self.ends, self.longest,
+                                    to_minutes(date), minutes, count)
+        return [(from_minutes(start),
+                 None if end is None else from_minutes(end))
+                for start, end in windows]
+
+    def between(self, start_date=None, end_date=None):
+        """
+        Return reservations starting in a range of dates
+        Args:
+            <datetime> start_date - the earliest start, None for no limit
+            <datetime> end_date - reservations start before it,
+                None for no limit
+        Return <list>:
+            reservations sorted by start date
+        """
+        first = 0 if start_date is None\
+            else bisect_left(self.starts, to_minutes(start_date))
+        last = len(self.starts) if end_date is None\
+            else bisect_left(self.starts, to_minutes(end_date))
+        return [self._reservation(position)
+                for position in range(first, last)]
+
+    def first_start(self):
+        """
+        Return the start date of the first reservation
+        Return <datetime>:
+            start date, None if the list is empty
+        """
+        if not self.starts:
+            return None
+        return from_minutes(self.starts[0])
+
+    def last_end(self):
+        """
+        Return the end date of the reservation that ends last
+        Return <datetime>:
+            end date, None if the list is empty
+        """
+        if not self.starts:
+            return None
+        # only reservations shorter than the longest one can end later
+        first = bisect_left(self.starts, self.starts[-1] - self.longest)
+        return from_minutes(max(self.ends[first:]))
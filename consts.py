@@ -1 +1,8 @@
 WRONG_ANSWER_BANNER = "! Wrong Answer !"
+WEEKLY_LIMIT = 2  # maximum number of bookings per client in one week
+COURTS = 1  # number of courts in the club
+LENGTHS = (30, 60, 90)  # allowed lengths of a booking in minutes
+FREE_WINDOWS = 5  # free windows shown when the chosen date is taken
+JSON_INDENTED = 'indented'  # json file indented by 4 spaces
+JSON_COMPACT = 'compact'  # json file without any whitespace
+JSON_LINES = 'ndjson'  # one json object for every reservation in a line
@@ -0,0 +1,228 @@
+"""
+Recruitment Task
+This script holds a container of the bookings for many courts
+which keeps a separate booking list for every court
+Author: Piotr Wołoszyk
+"""
+
+from heapq import merge
+from itertools import chain
+
+from bookinglist import BookingList
+
+
+class CourtBookingList():
+    """
+    Container of the bookings for many courts, it has the same methods
+    as BookingList, free dates are checked only on one court
+    Attributes:
+        factory : <callable>
+            creates a booking list for a court number,
+            BookingList by default
+        courts : <dict>
+            booking list of every court by its number
+    Methods:
+        court_list():
+            Return the booking list of a court
+        append():
+            Add a reservation
+        extend():
+            Add many reservations at once
+        remove():
+            Remove a reservation
+        find():
+            Find the client's reservation starting at a date
+        contains():
+            Check if the reservation is already on the list
+        week_count():
+            Count the client's reservations in the week of a date
+        next_free():
+            Find the first free date on a court
+        free_window():
+            Check if a date is free on a court and how long will be
+        free_windows():
+            Find the next free windows on a court
+        between():
+            Return reservations starting in a range of dates
+        first_start():
+            Return the start date of the first reservation
+        last_end():
+            Return the end date of the reservation that ends last
+    """
+
+    def __init__(self, factory=None):
+        self.factory = factory
+        self.courts = {}
+
+    def __len__(self):
+        return sum(len(booking_list) for booking_list in self.courts.values())
+
+    def __iter__(self):
+        return chain.from_iterable(self.courts.values())
+
+    def court_list(self, court):
+        """
+        Return the booking list of a court, create it if it is new
+        Args:
+            <int> court - number of the court
+        Return <BookingList>
+        """
+        booking_list = self.courts.get(court)
+        if booking_list is None:
+            booking_list = BookingList() if self.factory is None\
+                else self.factory(court)
+            self.courts[court] = booking_list
+        return booking_list
+
+    def append(self, reservation):
+        """
+        Add a reservation
+        Args:
+            <ClientReservation> reservation - reservation to add
+        """
+        self.court_list(reservation.court).append(reservation)
+
+    def extend(self, reservations):
+        """
+        Add many reservations at once
+        Args:
+            <list> reservations - list of ClientReservation objects
+        """
+        if isinstance(reservations, CourtBookingList):
+            # booking lists of the courts are added as a whole
+            for court, booking_list in reservations.courts.items():
+                self.court_list(court).extend(booking_list)
+            return
+        by_court = {}  # new reservations of every court
+        for reservation in reservations:
+            by_court.setdefault(reservation.court, []).append(reservation)
+        for court, court_reservations in by_court.items():
+            self.court_list(court).extend(court_reservations)
+
+    def remove(self, reservation):
+        """
+        Remove a reservation
+        Args:
+            <ClientReservation> reservation - reservation to remove
+        """
+        booking_list = self.courts.get(reservation.court)
+        if booking_list is None:
+            raise ValueError('reservation is not in the list')
+        booking_list.remove(reservation)
+
+    def find(self, name, start_date):
+        """
+        Find the client's reservation starting at a date on any court
+        Args:
+            <string> name - client's name
+            <datetime> start_date - reservation start date
+        Return <ClientReservation>:
+            found reservation or None
+        """
+        for court in sorted(self.courts):
+            reservation = self.courts[court].find(name, start_date)
+            if reservation is not None:
+                return reservation
+        return None
+
+    def contains(self, name, start_date, end_date, court=None):
+        """
+        Check if the reservation is already on the list
+        Args:
+            <string> name - client's name
+            <datetime> start_date - reservation start date
+            <datetime> end_date - reservation end date
+            <int> court - number of the court, any court if None
+        Return <bool>
+        """
+        if court is not None:
+            booking_list = self.courts.get(court)
+            return booking_list is not None\
+                and booking_list.contains(name, start_date, end_date)
+        return any(booking_list.contains(name, start_date, end_date)
+                   for booking_list in self.courts.values())
+
+    def week_count(self, name, date):
+        """
+        Count the client's reservations in the week of a date
+        on all courts
+        Args:
+            <string> name - client's name
+            <datetime> date - any date in the week
+        Return <int>
+        """
+        return sum(booking_list.week_count(name, date)
+                   for booking_list in self.courts.values())
+
+    def next_free(self, date, minutes, court=1):
+        """
+        Find the first free date on a court
+        Args:
+            <datetime> date - the earliest date to check
+            <int> minutes - length of the window
+            <int> court - number of the court
+        Return <datetime>
+        """
+        return self.court_list(court).next_free(date, minutes)
+
+    def free_window(self, date, court=1):
+        """
+        Check if a date is free on a court and how long will be
+        Args:
+            <datetime> date - date provided by the client
+            <int> court - number of the court
+        Return:
+            1)<datetime>
+                first date with at least 0,5h free
+            2)<int>
+                2, 1 or 0 if court will be available for 1,5h, 1h or 0,5h
+        """
+        return self.court_list(court).free_window(date)
+
+    def free_windows(self, date, minutes, count, court=1):
+        """
+        Find the next free windows on a court
+        Args:
+            <datetime> date - the earliest date to check
+            <int> minutes - the shortest window
+            <int> count - the largest number of windows
+            <int> court - number of the court
+        Return <list>:
+            (start, end) dates of every window, end is None
+            when the court is free from start on
+        """
+        return self.court_list(court).free_windows(date, minutes, count)
+
+    def between(self, start_date=None, end_date=None):
+        """
+        Return reservations starting in a range of dates on all courts
+        Args:
+            <datetime> start_date - the earliest start, None for no limit
+            <datetime> end_date - reservations start before it,
+                None for no limit
+        Return <list>:
+            reservations sorted by start date
+        """
+        return list(merge(*(booking_list.between(start_date, end_date)
+                            for booking_list in self.courts.values())))
+
+    def first_start(self):
+        """
+        Return the start date of the first reservation
+        Return <datetime>:
+            start date, None if the list is empty
+        """
+        return min((start for start in (booking_list.first_start()
+                                        for booking_list
+                                        in self.courts.values())
+                    if start is not None), default=None)
+
+    def last_end(self):
+        """
+        Return the end date of the reservation that ends last
+        Return <datetime>:
+            end date, None if the list is empty
+        """
+        return max((end for end in (booking_list.last_end()
+                                    for booking_list in self.courts.values())
+                    if end is not None), default=None)
@@ -0,0 +1,69 @@
+"""
+Recruitment Task
+This script writes reservations to a csv file in large batches
+with dates formatted from cached text
+Author: Piotr Wołoszyk
+"""
+
+import io
+from itertools import islice
+
+BATCH_ROWS = 4096  # rows written to the file at once
+HEADER = ['Name', ' start_time', ' end_time']  # first row of the file
+# text of every time of the day, position is the minute of the day
+TIMES = [f'{hour:02d}:{minute:02d}'
+         for hour in range(24) for minute in range(60)]
+
+
+def _csv_field(text):
+    """
+    Format a field the same way as csv.writer does
+    Args:
+        <string> text - value of the field
+    Return <string>:
+        the field quoted when it is needed
+    """
+    import csv
+    line = io.StringIO()
+    # a field followed by another one is never quoted only for being empty
+    csv.writer(line).writerow([text, ''])
+    return line.getvalue()[:-len(',\r\n')]
+
+
+def write_csv(csv_file, reservations, with_court=False):
+    """
+    Write reservations to a csv file with the header
+    The file is the same as written row by row by csv.writer
+    Args:
+        <file> csv_file - opened text file
+        <iterable> reservations - reservations to write
+        <bool> with_court - add a column with the number of the court
+    """
+    import csv  # imported when the first file is saved
+    csv.writer(csv_file).writerow(HEADER + [' court'] if with_court
+                                  else HEADER)
+    days = {}  # formatted days by their ordinal number
+    names = {}  # formatted names
+    reservations = iter(reservations)
+    while True:
+        lines = []
+        for reservation in islice(reservations, BATCH_ROWS):
+            name = names.get(reservation.name)
+            if name is None:
+                name = names[reservation.name] = _csv_field(reservation.name)
+            start, end = reservation.start_date, reservation.end_date
+            # strftime is used only for the first date of every day
+            start_day = days.get(start.toordinal())
+            if start_day is None:
+                start_day = days[start.toordinal()] = start.strftime(
+                    ' %d.%m.%Y ')
+            end_day = days.get(end.toordinal())
+            if end_day is None:
+                end_day = days[end.toordinal()] = end.strftime(' %d.%m.%Y ')
+            court = f', {reservation.court}' if with_court else ''
+            lines.append(f'{name},{start_day}'
+                         f'{TIMES[start.hour * 60 + start.minute]},{end_day}'
+                         f'{TIMES[end.hour * 60 + end.minute]}{court}\r\n')
+        if not lines:
+            return
+        csv_file.write(''.join(lines))
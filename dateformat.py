@@ -0,0 +1,60 @@
+"""
+Recruitment Task
+This script holds a fast parser of dates in the schedule files
+and conversion of dates to numbers of minutes
+Author: Piotr Wołoszyk
+"""
+
+from datetime import datetime, timedelta
+
+DATE_TIME_FORMAT = '%d.%m.%Y %H:%M'  # valid date format
+EPOCH = datetime(1970, 1, 1)  # dates are stored as minutes from that date
+
+
+def parse_date_time(text, cache=None):
+    """
+    Parse a date in {DD.MM.YYYY HH:MM} format
+    The fixed layout is sliced without strptime,
+    other layouts accepted by strptime still work
+    Args:
+        <string> text - date to parse
+        <dict> cache - already parsed dates, optional
+    Return <datetime>
+    Raises ValueError when the date is wrong
+    """
+    if cache is not None:
+        date = cache.get(text)
+        if date is not None:
+            return date
+    if len(text) == 16 and text[2] == '.' and text[5] == '.'\
+            and text[10] == ' ' and text[13] == ':'\
+            and text[0:2].isdigit() and text[3:5].isdigit()\
+            and text[6:10].isdigit() and text[11:13].isdigit()\
+            and text[14:16].isdigit():
+        date = datetime(int(text[6:10]), int(text[3:5]), int(text[0:2]),
+                        int(text[11:13]), int(text[14:16]))
+    else:
+        date = datetime.strptime(text, DATE_TIME_FORMAT)
+    if cache is not None:
+        cache[text] = date
+    return date
+
+
+def to_minutes(date):
+    """
+    Convert a date to the number of minutes from EPOCH
+    Args:
+        <datetime> date - date to convert
+    Return <int>
+    """
+    return (date - EPOCH) // timedelta(minutes=1)
+
+
+def from_minutes(minutes):
+    """
+    Convert the number of minutes from EPOCH to a date
+    Args:
+        <int> minutes - minutes to convert
+    Return <datetime>
+    """
+    return EPOCH + timedelta(minutes=minutes)
@@ -0,0 +1,86 @@
+"""
+Recruitment Task
+This script holds a cache of the printed schedule of every day
+so a day is formatted again only after its reservations change
+Author: Piotr Wołoszyk
+"""
+
+import threading
+from collections import OrderedDict
+
+CACHE_DAYS = 62  # the most days kept in the cache
+
+
+class DayCache():
+    """
+    Printed reservations of every day, the least recently used days
+    are dropped when the cache is full
+    A changed day is dropped at once, after changes of many days
+    the version grows and all older texts are ignored
+    Attributes:
+        size : <int>
+            the most days kept
+        version : <int>
+            number of changes of the whole schedule
+        days : <OrderedDict>
+            (version, text) by (day, with_court), least recently used first
+    Methods:
+        get():
+            Return the text of a day
+        put():
+            Remember the text of a day
+        invalidate():
+            Drop the text of a changed day or of all days
+    """
+
+    def __init__(self, size=CACHE_DAYS):
+        self.size = size
+        self.version = 0
+        self.days = OrderedDict()
+        self._lock = threading.Lock()  # readers share the cache
+
+    def get(self, day, with_court):
+        """
+        Return the text of a day
+        Args:
+            <date> day - day of the reservations
+            <bool> with_court - text shows the number of the court
+        Return <string>:
+            printed reservations, empty for a day without any,
+            None when the day is not in the cache
+        """
+        key = (day, with_court)
+        with self._lock:
+            entry = self.days.get(key)
+            if entry is None or entry[0] != self.version:
+                return None
+            self.days.move_to_end(key)
+            return entry[1]
+
+    def put(self, day, with_court, text):
+        """
+        Remember the text of a day
+        Args:
+            <date> day - day of the reservations
+            <bool> with_court - text shows the number of the court
+            <string> text - printed reservations
+        """
+        key = (day, with_court)
+        with self._lock:
+            self.days[key] = (self.version, text)
+            self.days.move_to_end(key)
+            if len(self.days) > self.size:
+                self.days.popitem(last=False)
+
+    def invalidate(self, day=None):
+        """
+        Drop the text of a changed day or of all days
+        Args:
+            <date> day - changed day, None when many days changed
+        """
+        with self._lock:
+            if day is None:
+                self.version += 1
+                return
+            self.days.pop((day, False), None)
+            self.days.pop((day, True), None)
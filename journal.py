@@ -0,0 +1,173 @@
+"""
+Recruitment Task
+This script holds a journal of the schedule changes
+which lets the program restore bookings after a crash
+Author: Piotr Wołoszyk
+"""
+
+import os
+
+from clientreservation import ClientReservation
+from dateformat import DATE_TIME_FORMAT, parse_date_time
+
+ADDED = '+'  # journal record of a new reservation
+DELETED = '-'  # journal record of a cancelled reservation
+
+
+class Journal():
+    """
+    Append-only file with one record for every added
+    or cancelled reservation
+    Attributes:
+        path : <string>
+            path to the journal file
+        sync_every : <int>
+            number of records written to disk at once
+        compact_every : <int>
+            number of records after which the journal should be compacted
+        records : <int>
+            number of records in the journal
+        kept : <int>
+            number of cancellations kept by the last compaction
+    Methods:
+        read():
+            Read all records from the journal
+        record():
+            Append a record to the journal
+        sync():
+            Write buffered records to disk
+        is_full():
+            Check if the journal should be compacted
+        compact():
+            Remove all records but the cancellations after the schedule
+            was saved
+        close():
+            Write buffered records and close the journal
+    """
+
+    def __init__(self, path, sync_every=32, compact_every=1000):
+        self.path = path
+        self.sync_every = sync_every
+        self.compact_every = compact_every
+        self.records = sum(1 for _ in self.read())
+        self.kept = 0
+        self._unsynced = 0  # records not written to disk yet
+        self._open()
+
+    def _open(self):
+        """
+        Open the journal file for appending records
+        """
+        import csv  # imported with the first journal
+        self._file = open(self.path, 'a', newline='', encoding='UTF-8')
+        self._writer = csv.writer(self._file)
+
+    def read(self):
+        """
+        Read all records from the journal
+        A record broken by a crash is skipped
+        Yield:
+            1)<string>
+                ADDED or DELETED
+            2)<ClientReservation>
+                added or cancelled reservation
+        """
+        if not os.path.exists(self.path):
+            return
+        import csv
+        with open(self.path, 'r', newline='', encoding='UTF-8') as file:
+            for row in csv.reader(file):
+                try:
+                    # the court is saved only when it is not the first one
+                    action, name, start_date, end_date, *court = row
+                    if action not in (ADDED, DELETED) or len(court) > 1:
+                        continue
+                    yield action, ClientReservation(
+                        name,
+                        parse_date_time(start_date),
+                        parse_date_time(end_date),
+                        int(court[0]) if court else 1)
+                except ValueError:
+                    continue
+
+    def record(self, action, reservation):
+        """
+        Append a record to the journal
+        Args:
+            <string> action - ADDED or DELETED
+            <ClientReservation> reservation - changed reservation
+        """
+        self._writer.writerow(self._row(action, reservation))
+        # the record survives a crash of the program at once
+        self._file.flush()
+        self.records += 1
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.sync()
+
+    @staticmethod
+    def _row(action, reservation):
+        """
+        Return the csv row of a record
+        Args:
+            <string> action - ADDED or DELETED
+            <ClientReservation> reservation - changed reservation
+        Return <list>
+        """
+        row = [action,
+               reservation.name,
+               reservation.start_date.strftime(DATE_TIME_FORMAT),
+               reservation.end_date.strftime(DATE_TIME_FORMAT)]
+        if reservation.court != 1:
+            row.append(reservation.court)
+        return row
+
+    def sync(self):
+        """
+        Write buffered records to disk
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def is_full(self):
+        """
+        Check if the journal should be compacted
+        Return <bool>
+        """
+        return self.records - self.kept >= self.compact_every
+
+    def compact(self, is_cancelled):
+        """
+        Remove all records but the cancellations after the schedule
+        was saved, the cancelled reservations can still be in the files
+        the schedule is loaded from and are removed again after loading
+        Args:
+            <function> is_cancelled - True for a reservation which is
+                not in the schedule any more
+        """
+        import csv
+        self.sync()
+        cancelled = {}  # kept cancellations in the order they were made
+        for action, reservation in self.read():
+            if action == DELETED and is_cancelled(reservation):
+                cancelled.setdefault(reservation, reservation)
+        with open(f'{self.path}.tmp', 'w', newline='', encoding='UTF-8')\
+                as file:
+            writer = csv.writer(file)
+            for reservation in cancelled.values():
+                writer.writerow(self._row(DELETED, reservation))
+            file.flush()
+            os.fsync(file.fileno())
+        # the old journal is replaced only by a complete one
+        self._file.close()
+        os.replace(f'{self.path}.tmp', self.path)
+        self._open()
+        self.records = self.kept = len(cancelled)
+
+    def close(self):
+        """
+        Write buffered records and close the journal
+        """
+        self.sync()
+        self._file.close()
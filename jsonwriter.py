@@ -0,0 +1,69 @@
+"""
+Recruitment Task
+This script writes the schedule to a json file day by day
+so only one day of reservations is kept in memory
+Author: Piotr Wołoszyk
+"""
+
+from consts import JSON_COMPACT, JSON_INDENTED, JSON_LINES
+
+DATE_FORMAT = '%d.%m.%Y'  # format of the days in the file
+
+
+def _reservation_object(reservation, with_court):
+    """
+    Describe a reservation as a json object
+    Args:
+        <ClientReservation> reservation - reservation to describe
+        <bool> with_court - add the number of the court
+    Return <dict>
+    """
+    json_object = {'name': reservation.name,
+                   'start_time': reservation.start_date.strftime('%H:%M'),
+                   'end_time': reservation.end_date.strftime('%H:%M')}
+    if with_court:
+        json_object['court'] = reservation.court
+    return json_object
+
+
+def write_json(json_file, days, json_format=JSON_INDENTED, with_court=False):
+    """
+    Write reservations grouped by day to a json file
+    JSON_INDENTED gives the same file as json.dump with indent=4
+    Args:
+        <file> json_file - opened text file
+        <iterable> days - pairs of a day and its reservations
+        <string> json_format - JSON_INDENTED, JSON_COMPACT or JSON_LINES
+        <bool> with_court - add the number of the court to reservations
+    """
+    import json  # not needed until a json file is saved
+    if json_format == JSON_LINES:
+        for day, reservations in days:
+            day = day.strftime(DATE_FORMAT)
+            for reservation in reservations:
+                json_file.write(json.dumps(
+                    {'date': day,
+                     **_reservation_object(reservation, with_court)},
+                    ensure_ascii=False))
+                json_file.write('\n')
+        return
+    if json_format == JSON_COMPACT:
+        options = {'separators': (',', ':')}
+        opening, separator, closing = '{', ',', '}'
+    elif json_format == JSON_INDENTED:
+        options = {'indent': 4}
+        opening, separator, closing = '{\n', ',\n', '\n}'
+    else:
+        raise ValueError(f'unknown json format: {json_format}')
+    written = False  # an empty schedule is written as {}
+    for day, reservations in days:
+        # one day is dumped as a whole object without its braces
+        text = json.dumps(
+            {day.strftime(DATE_FORMAT):
+             [_reservation_object(reservation, with_court)
+              for reservation in reservations]},
+            ensure_ascii=False, **options)
+        json_file.write(separator if written else opening)
+        json_file.write(text[len(opening):-len(closing)])
+        written = True
+    json_file.write(closing if written else '{}')
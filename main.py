@@ -15,8 +15,9 @@ def main():
     path_to_file = 'schedule'  # path to folder with csv and json file
     sch = Schedule()
     res = Reservation(sch)
-    sch.load_csv(path_to_file)
-    sch.load_json(path_to_file)
+    # the menu is shown while files are loaded in the background
+    # the journal holds changes made after the last backup
+    sch.start_loading(path_to_file, f'{path_to_file}/session.journal')
     while True:
         print('-'*30)
         print('Welcome to the Tennis Court Program!')
@@ -30,6 +31,12 @@ def main():
             '5) Exit\n'
             'Enter: 1, 2, 3, 4 or 5\n  $ ').strip()
 
+        # without the whole schedule no change or backup is safe
+        error = sch.loading_error()
+        if error is not None:
+            print(f'! The schedule could not be loaded ({error}) !')
+            sys.exit(1)
+
         if user_choice == '1':
             res.make_reservation()
         elif user_choice == '2':
@@ -40,10 +47,16 @@ def main():
             res.save_schedule()
         elif user_choice == '5':
             sch.make_backup()
+            if sch.journal is not None:
+                sch.journal.close()
             sys.exit()
         else:
             print(WRONG_ANSWER_BANNER)
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # commands given as arguments run without the menu
+        import cli
+        sys.exit(cli.main(sys.argv[1:]))
     main()
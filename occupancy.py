@@ -0,0 +1,190 @@
+"""
+Recruitment Task
+This script holds a bitmap of the taken half-hour slots of every day
+used to show free slots of a week or a month without checking dates
+Author: Piotr Wołoszyk
+"""
+
+from array import array
+from datetime import datetime, time, timedelta
+
+SLOT_MINUTES = 30  # length of one slot
+SLOTS = 24 * 60 // SLOT_MINUTES  # slots in a day
+FULL_DAY = (1 << SLOTS) - 1  # bitmap with every slot of a day set
+
+
+def slot_times(bitmap):
+    """
+    Return start times of the slots set in a bitmap
+    Args:
+        <int> bitmap - bit i is the slot starting i * SLOT_MINUTES
+            minutes after midnight
+    Return <list>:
+        list of time objects
+    """
+    times = []
+    while bitmap:
+        slot = (bitmap & -bitmap).bit_length() - 1
+        minutes = slot * SLOT_MINUTES
+        times.append(time(minutes // 60, minutes % 60))
+        bitmap &= bitmap - 1
+    return times
+
+
+class Occupancy():
+    """
+    Taken half-hour slots of every day and court kept as bitmaps,
+    a slot is taken when any reservation overlaps it
+    It is built from the booking list when it is used for the first time
+    and then updated with every added or removed reservation
+    Attributes:
+        built : <bool>
+            True when the bitmaps hold all reservations
+        bitmaps : <dict>
+            bitmap of the taken slots by (court, day)
+        counts : <dict>
+            number of reservations in every slot by (court, day)
+    Methods:
+        rebuild():
+            Build the bitmaps from all reservations
+        add():
+            Mark the slots of a reservation as taken
+        extend():
+            Mark the slots of many reservations as taken
+        remove():
+            Free the slots of a reservation no other one overlaps
+        taken():
+            Return the bitmap of the taken slots of a day
+        free_grid():
+            Return slots free on any of the courts for many days
+    """
+
+    def __init__(self):
+        self.built = False
+        self.bitmaps = {}
+        self.counts = {}
+
+    def rebuild(self, reservations):
+        """
+        Build the bitmaps from all reservations
+        The bitmaps are replaced at once, so readers of the schedule
+        building them at the same time do not see half of them
+        Args:
+            <iterable> reservations - all reservations of the schedule
+        """
+        occupancy = Occupancy()
+        occupancy.built = True
+        occupancy.extend(reservations)
+        self.bitmaps, self.counts = occupancy.bitmaps, occupancy.counts
+        self.built = True
+
+    @staticmethod
+    def _slots(reservation):
+        """
+        Find the slots a reservation overlaps
+        Args:
+            <ClientReservation> reservation - reservation to check
+        Yield:
+            1)<date>
+                day of the slots
+            2)<int>
+                first slot
+            3)<int>
+                slot after the last one
+        """
+        day = reservation.start_date.date()
+        midnight = datetime.combine(day, time.min)
+        first = (reservation.start_date - midnight)\
+            // timedelta(minutes=SLOT_MINUTES)
+        # a slot started before the end is taken
+        last = -((midnight - reservation.end_date)
+                 // timedelta(minutes=SLOT_MINUTES))
+        while last > SLOTS:
+            yield day, first, SLOTS
+            day += timedelta(days=1)
+            first, last = 0, last - SLOTS
+        if first < last:
+            yield day, first, last
+
+    def add(self, reservation):
+        """
+        Mark the slots of a reservation as taken
+        Args:
+            <ClientReservation> reservation - added reservation
+        """
+        if not self.built:
+            return
+        for day, first, last in self._slots(reservation):
+            key = (reservation.court, day)
+            counts = self.counts.get(key)
+            if counts is None:
+                counts = self.counts[key] = array('H', bytes(2 * SLOTS))
+            for slot in range(first, last):
+                counts[slot] += 1
+            self.bitmaps[key] = self.bitmaps.get(key, 0)\
+                | (1 << last) - (1 << first)
+
+    def extend(self, reservations):
+        """
+        Mark the slots of many reservations as taken
+        Args:
+            <iterable> reservations - added reservations
+        """
+        if not self.built:
+            return
+        for reservation in reservations:
+            self.add(reservation)
+
+    def remove(self, reservation):
+        """
+        Free the slots of a reservation no other one overlaps
+        Args:
+            <ClientReservation> reservation - removed reservation
+        """
+        if not self.built:
+            return
+        for day, first, last in self._slots(reservation):
+            key = (reservation.court, day)
+            counts = self.counts.get(key)
+            if counts is None:
+                continue
+            for slot in range(first, last):
+                if counts[slot] > 0:
+                    counts[slot] -= 1
+                if counts[slot] == 0:
+                    self.bitmaps[key] &= ~(1 << slot)
+            if not self.bitmaps[key]:
+                del self.bitmaps[key]
+                del self.counts[key]
+
+    def taken(self, day, court=1):
+        """
+        Return the bitmap of the taken slots of a day
+        Args:
+            <date> day - day to check
+            <int> court - number of the court
+        Return <int>:
+            bit i is set when the slot starting i * SLOT_MINUTES
+            minutes after midnight is taken
+        """
+        return self.bitmaps.get((court, day), 0)
+
+    def free_grid(self, first_day, days, courts):
+        """
+        Return slots free on any of the courts for many days
+        Args:
+            <date> first_day - the first day of the grid
+            <int> days - number of days
+            <iterable> courts - numbers of the courts
+        Return <list>:
+            pairs of a day and the bitmap of its free slots
+        """
+        courts = list(courts)
+        grid = []
+        for offset in range(days):
+            day = first_day + timedelta(days=offset)
+            free = 0
+            for court in courts:
+                free |= FULL_DAY & ~self.bitmaps.get((court, day), 0)
+            grid.append((day, free))
+        return grid
@@ -7,7 +7,29 @@ Author: Piotr Wołoszyk
 from datetime import datetime, timedelta
 from additionalexceptions import IsTooLate, StartOlderThanEnd
 from schedule import Schedule
-from consts import WRONG_ANSWER_BANNER
+from consts import FREE_WINDOWS, JSON_LINES, WRONG_ANSWER_BANNER
+
+
+def name_error(fullname):
+    """
+    Check the name or last name provided by the client
+    valid names should be alphabetical and longer than 2 character
+    Args:
+        <string> fullname - client's name
+    Return <string>:
+        message about the wrong name, None when the name is correct
+    """
+    if len(fullname) <= 1:
+        return '! Name is to short !'
+    if fullname.find(' ') == -1:
+        return '! You must enter your first name and surname !'
+    if all(
+            name.isalpha()
+            or name.isspace()
+            or name == '-'
+            for name in fullname):
+        return None
+    return '! Name is wrong !'
 
 
 class Reservation():
@@ -98,20 +120,11 @@ class Reservation():
         Return <string>
         """
 
-        if len(fullname) <= 1:
-            print('! Name is to short !')
-            return
-        if fullname.find(' ') == -1:
-            print('! You must enter your first name and surname !')
+        error = name_error(fullname)
+        if error is not None:
+            print(error)
             return
-        if all(
-                name.isalpha()
-                or name.isspace()
-                or name == '-'
-                for name in fullname):
-            return fullname.strip()
-        print('! Name is wrong !')
-        return
+        return fullname.strip()
 
     def make_reservation(self):
         """
@@ -134,8 +147,11 @@ class Reservation():
             input('Enter date as {DD.MM.YYYY HH:MM}:\n  $ ').strip())  # Get client's desired start date
         if start_date is None:
             return
-        # Check if the desired start date is available
-        new_date, hour = self.sch.date_is_free(start_date)
+        # Check if the desired start date is available on any court, the one
+        # free the longest allows every length of the booking,
+        # if every court is taken the next date is suggested on the first one
+        court = self.sch.longest_free_court(start_date) or 1
+        new_date, hour = self.sch.date_is_free(start_date, court)
 
         if new_date is None:
             return
@@ -151,10 +167,15 @@ class Reservation():
         if answer_new_date.lower() == 'yes':
             start_date = new_date
         elif answer_new_date.lower() == 'no':
-            print('The court is open 24/7, but please note that:\n'
-                  '1) you can only have 2 bookings per week\n'
-                  '2) Reservations can be made at least one hour in advance')
-            self.valid_date_time()
+            # show the next free times so the client can choose one
+            print('The court is free:')
+            for free_start, free_end in self.sch.free_windows(
+                    start_date, 30, FREE_WINDOWS, court):
+                free_until = '' if free_end is None\
+                    else f' to {free_end.strftime(date_format)}'
+                print(f'\t*from {free_start.strftime(date_format)}'
+                      f'{free_until}')
+            return
         elif answer_new_date != '':
             print(WRONG_ANSWER_BANNER)
             return
@@ -192,7 +213,9 @@ class Reservation():
             return
 
         # Add the reservation to the schedule
-        self.sch.add_reservation(fullname, start_date, end_date)
+        if self.sch.courts > 1:
+            print(f'Your court is number {court}')
+        self.sch.add_reservation(fullname, start_date, end_date, court)
         return
 
     def cancel_reservation(self):
@@ -217,9 +240,9 @@ class Reservation():
             return
 
         # Check if a reservation exists
-        index = self.sch.reservation_exists(
+        reservation = self.sch.reservation_exists(
             name, date)
-        if index == -1:
+        if reservation is None:
             print('! There is no reservation for You on this specified date!')
             return
         # current system time
@@ -229,7 +252,7 @@ class Reservation():
             return
         answer = input('Are you sure? (yes/no)\n  $ ').strip()
         if answer.lower() == 'yes':
-            self.sch.delete_reservation(index)
+            self.sch.delete_reservation(reservation)
             return
         if answer.lower() == 'no':
             return
@@ -247,7 +270,8 @@ class Reservation():
         if start_date is None:
             return
         filename = input('Enter a file name:\n  $ ').strip()
-        file_extension = input('Save file as:\n1)csv\n2)json?\n  $ ').strip()
+        file_extension = input(
+            'Save file as:\n1)csv\n2)json\n3)json lines?\n  $ ').strip()
         if file_extension == '1':
             self.sch.save_csv(start_date, end_date,
                               filename.strip())
@@ -256,6 +280,10 @@ class Reservation():
             self.sch.save_json(start_date, end_date,
                                filename.strip())
             return
+        if file_extension == '3':
+            self.sch.save_json(start_date, end_date,
+                               filename.strip(), JSON_LINES)
+            return
         print(WRONG_ANSWER_BANNER)
         return
 
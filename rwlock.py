@@ -0,0 +1,149 @@
+"""
+Recruitment Task
+This script holds a reader-writer lock which lets many threads
+read the schedule at once while changes are made one at a time
+Author: Piotr Wołoszyk
+"""
+
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+
+class RWLock():
+    """
+    Reader-writer lock, readers do not block each other,
+    a writer waits for all readers and new readers wait for the writer
+    A thread can take the lock again while it holds it, but a reader
+    can not become a writer
+    Methods:
+        read():
+            Hold the lock for reading in a with block
+        write():
+            Hold the lock for writing in a with block
+        acquire_read():
+            Take the lock for reading
+        release_read():
+            Release the lock taken for reading
+        acquire_write():
+            Take the lock for writing
+        release_write():
+            Release the lock taken for writing
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0  # threads holding the lock for reading
+        self._waiting_writers = 0  # threads waiting to write
+        self._writer = None  # thread holding the lock for writing
+        self._writes = 0  # how many times the writer took the lock
+        self._local = threading.local()  # reads taken by each thread
+
+    @contextmanager
+    def read(self):
+        """
+        Hold the lock for reading in a with block
+        """
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """
+        Hold the lock for writing in a with block
+        """
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    def acquire_read(self):
+        """
+        Take the lock for reading
+        """
+        reads = getattr(self._local, 'reads', 0)
+        self._local.reads = reads + 1
+        # the writer and threads already reading do not wait
+        if reads or self._writer == threading.get_ident():
+            return
+        with self._condition:
+            # waiting writers go first so they are not starved
+            self._condition.wait_for(lambda: self._writer is None
+                                     and not self._waiting_writers)
+            self._readers += 1
+        self._local.counted = True
+
+    def release_read(self):
+        """
+        Release the lock taken for reading
+        """
+        self._local.reads -= 1
+        if self._local.reads or not getattr(self._local, 'counted', False):
+            return
+        self._local.counted = False
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        """
+        Take the lock for writing
+        Raises RuntimeError when the thread holds the lock for reading
+        """
+        thread = threading.get_ident()
+        if self._writer == thread:
+            self._writes += 1
+            return
+        if getattr(self._local, 'reads', 0):
+            raise RuntimeError('a reader can not take the lock for writing')
+        with self._condition:
+            self._waiting_writers += 1
+            self._condition.wait_for(lambda: self._writer is None
+                                     and not self._readers)
+            self._waiting_writers -= 1
+            self._writer = thread
+            self._writes = 1
+
+    def release_write(self):
+        """
+        Release the lock taken for writing
+        """
+        self._writes -= 1
+        if self._writes:
+            return
+        with self._condition:
+            self._writer = None
+            self._condition.notify_all()
+
+
+def reading(method):
+    """
+    Run a method while its object's lock is held for reading
+    Args:
+        <function> method - method of an object with a lock attribute
+    Return <function>
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def writing(method):
+    """
+    Run a method while its object's lock is held for writing
+    Args:
+        <function> method - method of an object with a lock attribute
+    Return <function>
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock.write():
+            return method(self, *args, **kwargs)
+    return wrapper
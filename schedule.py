@@ -8,13 +8,88 @@ operations on the reservation list
 Author: Piotr Wołoszyk
 """
 
-import csv
-import json
-from datetime import datetime, timedelta
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+from collections import Counter
+from functools import wraps
+from itertools import groupby
 from pathlib import Path
 
+from additionalexceptions import BookingError, DateTaken
 from clientreservation import ClientReservation
-from consts import WRONG_ANSWER_BANNER
+from consts import (COURTS, JSON_INDENTED, JSON_LINES, LENGTHS,
+                    WEEKLY_LIMIT, WRONG_ANSWER_BANNER)
+from courtlist import CourtBookingList
+from csvwriter import write_csv
+from dateformat import parse_date_time
+from daycache import DayCache
+from journal import ADDED, DELETED, Journal
+from jsonwriter import write_json
+from occupancy import Occupancy
+from rwlock import RWLock
+from rwlock import reading as locked_reading, writing as locked_writing
+from snapshot import (BACKUP_NAME, SNAPSHOT_NAME, file_sources, read_snapshot,
+                      write_snapshot)
+
+CHUNK_DAYS = 31  # days of reservations read at once by reservations_by_day
+PROGRESS_SECONDS = 0.2  # how often the loading progress is shown
+
+
+def reading(method):
+    """
+    Run a method holding the lock for reading once the schedule is loaded
+    Args:
+        <function> method - method of the schedule
+    Return <function>
+    """
+    locked = locked_reading(method)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._ensure_loaded()
+        return locked(self, *args, **kwargs)
+    return wrapper
+
+
+def writing(method):
+    """
+    Run a method holding the lock for writing once the schedule is loaded
+    Args:
+        <function> method - method of the schedule
+    Return <function>
+    """
+    locked = locked_writing(method)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._ensure_loaded()
+        return locked(self, *args, **kwargs)
+    return wrapper
+
+
+def read_file(path):
+    """
+    Read all reservations from a csv or json file
+    It runs in a worker process when the folder is loaded in parallel
+    Args:
+        <Path> path - path to csv or json file
+    Return:
+        1)<list>
+            reservations read before an error
+        2)<string>
+            error message, None when the file was read
+    """
+    import csv  # csv.Error is raised by a broken csv file
+    reader = Schedule.read_csv if path.suffix == '.csv' else Schedule.read_json
+    reservations = []  # reservations read from the file
+    try:
+        for reservation in reader(path, {}):
+            reservations.append(reservation)
+    except (OSError, ValueError, KeyError, IndexError, AttributeError,
+            TypeError, csv.Error) as error:
+        return reservations, f'{type(error).__name__}: {error}'
+    return reservations, None
 
 
 class Schedule():
@@ -25,34 +100,146 @@ class Schedule():
     Methods:
         new_booking():
             Check if the reservation already exists
+        read_json():
+            Read reservations from a json file one by one
+        read_csv():
+            Read reservations from a csv file one by one
         load_json():
             Load data from json files.
         load_csv():
             Load data from csv files.
+        load_folder():
+            Load data from all csv and json files using many processes
+        load_file():
+            Load reservations from one csv or json file
+        start_loading():
+            Load the schedule in a background thread
+        loading_error():
+            Wait for the schedule and return the error which stopped loading
         print_schedule_output():
             Print the schedule
         save_schedule():
             Save the schedule to a file in the path provided by the client
         save_csv():
             Save the schedule as a csv file
-        save_csv():
+        save_json():
             Save the schedule as a json file
+        reservations_between():
+            Return reservations starting between two days
+        reservations_by_day():
+            Group reservations starting between two days by day
         too_many_reservation():
             Check if a client has exceeded the booking limit for this week
+        bookings_left():
+            Check how many bookings the client can still make this week
         reservation_exists():
             Check if a reservation exists
         is_empty():
             Checks if the reservation list is empty
         add_reservation():
             adds reservations to the list
+        book():
+            Check the date and the booking limit and book at once
+        book_many():
+            Book many reservations at once, all of them or none
+        recurring():
+            Return requests for bookings repeated at a fixed interval
         delete_reservation():
             Removes reservations from the list
         date_is_free():
             Check if a provided date is free and how long will be
+        next_free_date():
+            Find the first date when the court is free for the given time
+        free_court():
+            Find a court which is free at a date
+        longest_free_court():
+            Find the court which stays free the longest from a date
+        free_windows():
+            Find the next free windows of at least the given length
+        week_availability():
+            Return free half-hour slots of every day in a week
+        month_availability():
+            Return free half-hour slots of every day in a month
+        open_journal():
+            Replay changes saved in the journal and record new ones in it
+        make_backup():
+            Save the schedule to a csv file and compact the journal
     """
 
-    booking_list = []  # list of all bookings
+    booking_list = CourtBookingList()  # list of all bookings
+    journal = None  # journal of changes made since the last backup
+    courts = COURTS  # number of courts in the club
+    occupancy = Occupancy()  # taken half-hour slots of booking_list
+    rendered = DayCache()  # printed reservations of the recent days
+    lock = RWLock()  # lock of booking_list used by many threads
+    loader = None  # thread loading the schedule in the background
+    load_progress = (0, 0)  # loaded and all files of the folder
+    load_error = None  # exception which stopped loading in the background
+    sources = None  # folder and description of the files loaded from it
+
+    def __init__(self, booking_list=None, courts=None):
+        """
+        Args:
+            <BookingList> booking_list - storage of the bookings,
+                CourtBookingList keeps every court in its own list,
+                shardlist.court_shards also splits every court by month,
+                any other booking list treats all courts as one,
+                by default all schedules share one CourtBookingList
+            <int> courts - number of courts in the club
+        """
+        if booking_list is not None:
+            self.booking_list = booking_list
+            self.occupancy = Occupancy()
+            self.rendered = DayCache()
+            self.lock = RWLock()
+        if courts is not None:
+            self.courts = courts
+
+    def _court_list(self, court):
+        """
+        Return the booking list of a court
+        Args:
+            <int> court - number of the court
+        Return <BookingList>
+        """
+        if isinstance(self.booking_list, CourtBookingList):
+            return self.booking_list.court_list(court)
+        return self.booking_list
+
+    def _extend(self, reservations):
+        """
+        Add many reservations at once, skipping the duplicates
+        Reservations read before an error are added as well
+        Args:
+            <iterable> reservations - ClientReservation objects
+        Return <int>:
+            number of skipped duplicates
+        """
+        new_reservations = {}  # reservations not found in the schedule
+        read = 0  # number of reservations read
+        try:
+            for reservation in reservations:
+                read += 1
+                if not self._court_list(reservation.court).contains(
+                        reservation.name,
+                        reservation.start_date,
+                        reservation.end_date):
+                    new_reservations.setdefault(reservation, reservation)
+                    self.courts = max(self.courts, reservation.court)
+        finally:
+            self.booking_list.extend(new_reservations.values())
+            self.occupancy.extend(new_reservations.values())
+            days = {reservation.start_date.date()
+                    for reservation in new_reservations}
+            if len(days) > self.rendered.size:
+                self.rendered.invalidate()
+            else:
+                # a few changed days, e.g. a replayed journal record
+                for day in days:
+                    self.rendered.invalidate(day)
+        return read - len(new_reservations)
 
+    @reading
     def is_empty(self):
         """
         Checks if the reservation list is empty
@@ -64,31 +251,211 @@ class Schedule():
             return True
         return False
 
-    def add_reservation(self, fullname, start_date, end_date):
+    @writing
+    def add_reservation(self, fullname, start_date, end_date, court=1,
+                        quiet=False):
         """
         adds reservations to the list
         Args:
             <string> fullname - client's name
             <datetime> start_date - booking start date
             <datetime> end_date - booking end date
+            <int> court - number of the booked court
+            <bool> quiet - do not print the confirmation
+        Return <ClientReservation>:
+            the new reservation
         """
-        self.booking_list.append(ClientReservation(
-            fullname,
-            start_date,
-            end_date))
-        print('Booking successful!')
-        return
+        reservation = ClientReservation(fullname, start_date, end_date,
+                                        court)
+        self.booking_list.append(reservation)
+        self.occupancy.add(reservation)
+        self.rendered.invalidate(start_date.date())
+        self._record(ADDED, reservation)
+        if not quiet:
+            print('Booking successful!')
+        return reservation
+
+    @writing
+    def book(self, fullname, start_date, minutes, court=None):
+        """
+        Check the date and the booking limit and book at once
+        No other thread can book between the checks and the booking
+        Args:
+            <string> fullname - client's name
+            <datetime> start_date - booking start date
+            <int> minutes - length of the booking, 30, 60 or 90
+            <int> court - number of the court, the first free if None
+        Return <ClientReservation>:
+            the new reservation
+        Raises BookingError when the client can not book,
+        DateTaken when the court is not free
+        """
+        end_date = start_date + timedelta(minutes=minutes)
+        if self.too_many_reservation(fullname, start_date):
+            raise BookingError(
+                'You have exceeded your booking limit for this week')
+        if not self.new_booking(fullname, start_date, end_date):
+            raise BookingError('Reservation already exists')
+        if court is None:
+            court = self.free_court(start_date, minutes)
+        elif self.next_free_date(start_date, minutes, court) != start_date:
+            court = None
+        if court is None:
+            raise DateTaken('The time you chose is unavailable')
+        return self.add_reservation(fullname, start_date, end_date, court,
+                                    quiet=True)
+
+    @writing
+    def book_many(self, requests):
+        """
+        Book many reservations at once, all of them or none
+        Requests are checked against the schedule and against each other
+        in one pass in the order of their start dates
+        Args:
+            <iterable> requests - (name, start_date, minutes) tuples
+                or (name, start_date, minutes, court) tuples,
+                the first free court is used when the court is None,
+                minutes have to be 30, 60 or 90
+        Return <list>:
+            for every request in the given order the new reservation
+            or a message why it can not be booked, reservations are
+            added only when none of the requests has a message
+        """
+        requests = [tuple(request) + (None,) * (4 - len(request))
+                    for request in requests]
+        results = [None] * len(requests)
+        booked_until = {}  # end of the batch bookings on every court
+        week_counts = Counter()  # batch bookings of a client in a week
+        keys = set()  # batch bookings to find duplicates
+        for position in sorted(range(len(requests)),
+                               key=lambda position: requests[position][1]):
+            fullname, start_date, minutes, court = requests[position]
+            try:
+                if minutes not in LENGTHS:
+                    raise BookingError(f'minutes must be one of {LENGTHS}')
+                if court is not None and court not in range(1,
+                                                            self.courts + 1):
+                    raise BookingError('There is no such court')
+                end_date = start_date + timedelta(minutes=minutes)
+                week = (fullname, *start_date.isocalendar()[:2])
+                if self.booking_list.week_count(fullname, start_date)\
+                        + week_counts[week] >= WEEKLY_LIMIT:
+                    raise BookingError('You have exceeded your booking limit'
+                                       ' for this week')
+                key = (fullname, start_date, end_date)
+                if key in keys\
+                        or not self.new_booking(fullname, start_date,
+                                                end_date):
+                    raise BookingError('Reservation already exists')
+                courts = range(1, self.courts + 1) if court is None\
+                    else [court]
+                # the court has to be free in the schedule and in the batch
+                court = next(
+                    (court for court in courts
+                     if booked_until.get(court, start_date) <= start_date
+                     and self.next_free_date(start_date, minutes,
+                                             court) == start_date), None)
+                if court is None:
+                    raise DateTaken('The time you chose is unavailable')
+            except BookingError as error:
+                results[position] = str(error)
+                continue
+            except OverflowError:
+                results[position] = 'This date is too far from now'
+                continue
+            booked_until[court] = max(booked_until.get(court, end_date),
+                                      end_date)
+            week_counts[week] += 1
+            keys.add(key)
+            results[position] = ClientReservation(fullname, start_date,
+                                                  end_date, court)
+        if any(isinstance(result, str) for result in results):
+            return results
+        self.booking_list.extend(results)
+        self.occupancy.extend(results)
+        for reservation in results:
+            self.rendered.invalidate(reservation.start_date.date())
+            self._record(ADDED, reservation)
+        return results
 
-    def delete_reservation(self, index):
+    @staticmethod
+    def recurring(fullname, start_date, minutes, count, days=7, court=None):
+        """
+        Return requests for bookings repeated at a fixed interval
+        Args:
+            <string> fullname - client's name
+            <datetime> start_date - start of the first booking
+            <int> minutes - length of every booking
+            <int> count - number of bookings
+            <int> days - days between the bookings, every week by default
+            <int> court - number of the court, the first free if None
+        Return <list>:
+            requests for book_many()
+        """
+        return [(fullname, start_date + timedelta(days=days * repeat),
+                 minutes, court)
+                for repeat in range(count)]
+
+    @writing
+    def delete_reservation(self, reservation, quiet=False):
         """
         Removes reservations from the list
         Args:
-            <int> index - reservation index to be deleted
+            <ClientReservation> reservation - reservation to be deleted
+            <bool> quiet - do not print the confirmation
         """
-        del self.booking_list[index]
-        print('Reservations have been cancelled!')
+        self.booking_list.remove(reservation)
+        self.occupancy.remove(reservation)
+        self.rendered.invalidate(reservation.start_date.date())
+        self._record(DELETED, reservation)
+        if not quiet:
+            print('Reservations have been cancelled!')
         return
 
+    def _record(self, action, reservation):
+        """
+        Save a change in the journal, compact the journal when it is full
+        Args:
+            <string> action - ADDED or DELETED
+            <ClientReservation> reservation - changed reservation
+        """
+        if self.journal is None:
+            return
+        self.journal.record(action, reservation)
+        if self.journal.is_full():
+            # the change is already saved, a failed backup only leaves
+            # the journal longer until the next one
+            try:
+                self.make_backup()
+            except OSError as error:
+                print(f'! The backup could not be saved ({error}) !')
+
+    @writing
+    def open_journal(self, path):
+        """
+        Replay changes saved in the journal and record new ones in it
+        Args:
+            <string> path - path to the journal file
+        Return <int>:
+            number of replayed changes
+        """
+        journal = Journal(path)
+        replayed = 0  # number of replayed changes
+        for action, reservation in journal.read():
+            replayed += 1
+            if action == ADDED:
+                self._extend([reservation])
+            elif self._court_list(reservation.court).contains(
+                    reservation.name,
+                    reservation.start_date,
+                    reservation.end_date):
+                self.booking_list.remove(reservation)
+                self.occupancy.remove(reservation)
+                self.rendered.invalidate(reservation.start_date.date())
+        self.journal = journal
+        return replayed
+
+    @reading
     def too_many_reservation(self, name, date):
         """
         Check if a client has exceeded the booking limit for this week
@@ -101,26 +468,23 @@ class Schedule():
             False when client still can book
         """
 
-        booking = []  # list of checked client's reservations
-        # day one week later from provided date
-        week_start_date = date - timedelta(days=date.weekday())
-        try:
-            week_end_date = week_start_date + timedelta(days=6)
-        except OverflowError:
-            week_end_date = date
-        if date > week_end_date:
-            return False
-        for reservation in self.booking_list:
-            if reservation.name == name:
-                booking.append(reservation.start_date)
-        counter = 0
-        for book in booking:
-            if week_start_date <= book < week_end_date:
-                counter += 1
-        if counter >= 2:
-            return True
-        return False
+        return self.booking_list.week_count(name, date) >= WEEKLY_LIMIT
+
+    @reading
+    def bookings_left(self, name, date):
+        """
+        Check how many bookings the client can still make this week
+
+        Args:
+            <sting> name - client's name
+            <datetime> date - any date in the week
+        Return <int>:
+            number of bookings left in the week of the date
+        """
+        booked = self.booking_list.week_count(name, date)
+        return max(WEEKLY_LIMIT - booked, 0)
 
+    @reading
     def reservation_exists(self, name, date):
         """
         Check if a reservation exists
@@ -128,29 +492,20 @@ class Schedule():
         Args:
             <string> name - client's name
             <datetime> date - the date of the booking to cancel
-        Return <int>:
-            if the reservation exists returns the index of the reservation,
-            if not returns -1
+        Return <ClientReservation>:
+            if the reservation exists returns the reservation,
+            if not returns None
         """
+        return self.booking_list.find(name, date)
 
-        index = 0  # client's booking index
-        # iterating through the reservations and
-        # check if one provided by the client exists
-        for reservation in self.booking_list:
-            date_on_list = reservation.start_date
-
-            if reservation.name == name\
-                    and date_on_list == date:
-                return index
-            index += 1
-        return -1
-
-    def date_is_free(self, date):
+    @reading
+    def date_is_free(self, date, court=1):
         """
         Check if a provided date is free and how long will be
 
         Args:
             <datetime> date - date provided by the client
+            <int> court - number of the court
 
         Return:
             1)<datetime>
@@ -162,37 +517,141 @@ class Schedule():
                 0 if court will be available for 0,5h
         """
 
-        self.booking_list.sort(key=lambda x: x.start_date)
-        # hold date 0,5h later then provided
-        sixty_minutes = date + timedelta(minutes=30)
-        # hold date 1h later then provided
-        ninety_minutes = date + timedelta(minutes=60)
+        try:
+            date, hour = self._court_list(court).free_window(date)
+            date + timedelta(minutes=90)
+        except OverflowError:
+            print('! This date is too far  from now!')
+            return None, None
+        return date, hour
+
+    @reading
+    def next_free_date(self, date, minutes, court=1):
+        """
+        Find the first date when the court is free for the given time
+
+        Args:
+            <datetime> date - the earliest date to check
+            <int> minutes - length of the booking, 30, 60 or 90
+            <int> court - number of the court
+        Return <datetime>:
+            first free date, None if the date is too far from now
+        """
+        try:
+            date = self._court_list(court).next_free(date, minutes)
+            date + timedelta(minutes=minutes)
+        except OverflowError:
+            return None
+        return date
 
-        # iterating over reservations
-        # and check in how long court will be available
-        for reservation in self.booking_list:
-            start_date = reservation.start_date
-            end_date = reservation.end_date
+    @reading
+    def free_court(self, date, minutes=30):
+        """
+        Find a court which is free at a date
+        Every court is checked with its own index
+        Args:
+            <datetime> date - start of the booking
+            <int> minutes - length of the booking, 30, 60 or 90
+        Return <int>:
+            number of the first free court, None if all courts are taken
+        """
+        for court in range(1, self.courts + 1):
+            if self.next_free_date(date, minutes, court) == date:
+                return court
+        return None
+
+    @reading
+    def longest_free_court(self, date):
+        """
+        Find the court which stays free the longest from a date
+        so the client can choose any length of the booking
+        Args:
+            <datetime> date - start of the booking
+        Return <int>:
+            number of the court, the first one when many are free
+            as long, None if all courts are taken
+        """
+        found, longest = None, -1  # best court and its free window
+        for court in range(1, self.courts + 1):
             try:
-                end_date + timedelta(minutes=90)
+                free_date, hour = self._court_list(court).free_window(date)
             except OverflowError:
-                print('! This date is too far  from now!')
-                return None, None
-            if start_date <= date < end_date:
-                date = end_date
-                sixty_minutes = date + timedelta(minutes=30)
-                ninety_minutes = date + timedelta(minutes=60)
-            if start_date <= sixty_minutes < end_date:
-                sixty_minutes = end_date
-            if start_date <= ninety_minutes < end_date:
-                ninety_minutes = end_date
-        if date + timedelta(minutes=30) == sixty_minutes and\
-                date + timedelta(minutes=60) == ninety_minutes:
-            return date, 2
-        if date + timedelta(minutes=30) == sixty_minutes:
-            return date, 1
-        return date, 0
+                return None
+            if free_date == date and hour > longest:
+                found, longest = court, hour
+        return found
+
+    @reading
+    def free_windows(self, after, minutes, count, court=1):
+        """
+        Find the next free windows of at least the given length
+        All windows are found in one walk over the court's index
+
+        Args:
+            <datetime> after - the earliest date to check
+            <int> minutes - the shortest window
+            <int> count - the largest number of windows
+            <int> court - number of the court
+        Return <list>:
+            (start, end) dates of every window, end is None when
+            the court is free from start on, an empty list when
+            the date is too far from now
+        """
+        try:
+            return self._court_list(court).free_windows(after, minutes,
+                                                        count)
+        except OverflowError:
+            return []
+
+    def _free_grid(self, first_day, days, court):
+        """
+        Return free half-hour slots of every day in a range
+        Args:
+            <date> first_day - the first day
+            <int> days - number of days
+            <int> court - number of the court, any court if None
+        Return <list>:
+            pairs of a day and the bitmap of its free slots,
+            occupancy.slot_times() gives their start times
+        """
+        if not self.occupancy.built:
+            self.occupancy.rebuild(self.booking_list)
+        courts = range(1, self.courts + 1) if court is None else [court]
+        return self.occupancy.free_grid(first_day, days, courts)
+
+    @reading
+    def week_availability(self, date, court=None):
+        """
+        Return free half-hour slots of every day in a week
+        Args:
+            <datetime> date - any day in the week
+            <int> court - number of the court, any court if None
+        Return <list>:
+            pairs of a day from Monday to Sunday
+            and the bitmap of its free slots
+        """
+        if isinstance(date, datetime):
+            date = date.date()
+        monday = date - timedelta(days=date.weekday())
+        return self._free_grid(monday, 7, court)
+
+    @reading
+    def month_availability(self, year, month, court=None):
+        """
+        Return free half-hour slots of every day in a month
+        Args:
+            <int> year - year of the month
+            <int> month - month number, 1 to 12
+            <int> court - number of the court, any court if None
+        Return <list>:
+            pairs of a day and the bitmap of its free slots
+        """
+        first_day = date(year, month, 1)
+        next_month = date(year + month // 12, month % 12 + 1, 1)
+        return self._free_grid(first_day, (next_month - first_day).days,
+                               court)
 
+    @reading
     def new_booking(self, name, start_date, end_date):
         """
         Check if the reservation already exists
@@ -204,91 +663,285 @@ class Schedule():
         Return <bool>:
             False reservation already exists or True when is not
         """
-        # iterate through the reservations and see if it already exists
-        for reservation in self.booking_list:
-            if (reservation.name == name
-                    and reservation.start_date == start_date
-                    and reservation.end_date == end_date):
-                return False
-        return True
+        return not self.booking_list.contains(name, start_date, end_date)
+
+    @staticmethod
+    def read_csv(csv_path, cache=None):
+        """
+        Read reservations from a csv file one by one
+        Args:
+            <string> csv_path - path to csv file
+            <dict> cache - already parsed dates, optional
+        Yield <ClientReservation>
+        Raises ValueError when a date in the file is wrong
+        """
+        import csv  # imported only when a csv file is read
+        with open(csv_path, 'r', encoding='UTF-8') as csv_file:
+            csv_line = csv.reader(csv_file)
+            _ = next(csv_line, None)
+            for row in csv_line:
+                # the court column is optional
+                court = row[3].strip() if len(row) > 3 else ''
+                yield ClientReservation(
+                    row[0].strip(),
+                    parse_date_time(row[1].strip(), cache),
+                    parse_date_time(row[2].strip(), cache),
+                    int(court) if court else 1)
+
+    @staticmethod
+    def read_json(json_path, cache=None):
+        """
+        Read reservations from a json file one by one
+        Args:
+            <string> json_path - path to json file
+            <dict> cache - already parsed dates, optional
+        Yield <ClientReservation>
+        Raises ValueError when a date in the file is wrong
+        """
+        import json  # imported only when a json file is read
+        with open(json_path, 'r', encoding='UTF-8') as json_file:
+            data = json.load(json_file)
+        for key, values in data.items():
+            # short keys {DD.MM} are dates from 2023
+            day = key if len(key) == 10 else f'{key}.2023'
+            for row in values:
+                yield ClientReservation(
+                    row['name'].strip(),
+                    parse_date_time(f'{day} {row["start_time"]}', cache),
+                    parse_date_time(f'{day} {row["end_time"]}', cache),
+                    int(row.get('court', 1)))
 
+    @writing
     def load_csv(self, path_to_file):
         """
         Load data from csv files.
         Args:
             <string> path_to_file - hold path to folder with csv file
+        Return <int>:
+            number of skipped duplicates
         """
 
-        date_format = '%d.%m.%Y %H:%M'  # valid date format
+        skipped = 0  # number of duplicates in all files
         # load from csv files
         all_csv_paths = Path(path_to_file).glob("*.csv")
         for csv_path in all_csv_paths:
             print(f"Found: {csv_path}")
-            with open(csv_path, 'r', encoding='UTF-8') as csv_file:
-                csv_line = csv.reader(csv_file)
-                _ = next(csv_line)
-                for row in csv_line:
-                    name = row[0].strip()
-                    try:
-                        start_date = row[1].strip()
-                        start_date = datetime.strptime(start_date, date_format)
-                        end_date = row[2].strip()
-                        end_date = datetime.strptime(end_date, date_format)
-                    except ValueError:
-                        print(f'{csv_path} upload failed')
-                        return
-                    # saving reservations on the list
-                    if self.new_booking(name,
-                                        start_date,
-                                        end_date):
-                        self.booking_list.append(ClientReservation(
-                            name, start_date, end_date))
-        return
+            cache = {}  # dates already parsed in this file
+            # saving reservations on the list
+            try:
+                duplicates = self._extend(self.read_csv(csv_path, cache))
+            except ValueError:
+                print(f'{csv_path} upload failed')
+                return skipped
+            if duplicates:
+                print(f'Skipped {duplicates} duplicates in {csv_path}')
+            skipped += duplicates
+        return skipped
 
+    @writing
     def load_json(self, path_to_file):
         """
         Load data from csv or json files.
         Args:
             <string> path_to _file - hold path to folder with json file
+        Return <int>:
+            number of skipped duplicates
         """
 
-        date_format = '%d.%m.%Y %H:%M'  # valid date format
+        skipped = 0  # number of duplicates in all files
         # load from json files
         all_json_paths = Path(path_to_file).glob("*.json")
         for json_path in all_json_paths:
             print(f"Found: {json_path}")
-            with open(json_path, 'r', encoding='UTF-8') as json_file:
-                data = json.load(json_file)
-            for key, values in data.items():
-                for row in values:
-                    name = row['name'].strip()
-                    if len(key) == 10:
-                        try:
-                            start_date = f'{key} {row["start_time"]}'
-                            start_date = datetime.strptime(start_date, date_format)
-                            end_date = f'{key} {row["end_time"]}'
-                            end_date = datetime.strptime(end_date, date_format)
-                        except ValueError:
-                            print(f'{json_path} upload failed')
-                            return
-                    else:
-                        try:
-                            start_date = f'{key}.2023 {row["start_time"]}'
-                            start_date = datetime.strptime(start_date, date_format)
-                            end_date = f'{key}.2023 {row["end_time"]}'
-                            end_date = datetime.strptime(end_date, date_format)
-                        except ValueError:
-                            print(f'{json_path} upload failed')
-                            return
-
-                    # saving reservations on the list
-                    if self.new_booking(name,
-                                        start_date,
-                                        end_date):
-
-                        self.booking_list.append(ClientReservation(
-                            name, start_date, end_date))
+            cache = {}  # dates already parsed in this file
+            # saving reservations on the list
+            try:
+                duplicates = self._extend(self.read_json(json_path, cache))
+            except ValueError:
+                print(f'{json_path} upload failed')
+                return skipped
+            if duplicates:
+                print(f'Skipped {duplicates} duplicates in {json_path}')
+            skipped += duplicates
+        return skipped
+
+    @writing
+    def load_folder(self, path_to_file, processes=None, log=print):
+        """
+        Load data from all csv and json files using many processes
+        Files are read in worker processes and merged in this one,
+        a file with an error does not stop loading the other files.
+        When no file changed since the last time the schedule is loaded
+        from the binary snapshot instead
+        Args:
+            <string> path_to_file - hold path to folder with files
+            <int> processes - number of worker processes,
+                all cores by default, 1 reads files in this process
+            <function> log - called with every message about the files
+        Return <int>:
+            number of skipped duplicates
+        """
+
+        folder = Path(path_to_file)
+        paths = sorted(folder.glob("*.csv")) + sorted(folder.glob("*.json"))
+        sources = file_sources([path for path in paths
+                                if path.name != BACKUP_NAME])
+        # the snapshot saved with the next backup describes these files
+        self.sources = (folder, sources)
+        snapshot_path = folder / SNAPSHOT_NAME
+        was_empty = self.is_empty()
+        saved = read_snapshot(snapshot_path, sources)
+        if saved is not None:
+            log(f"Found: {snapshot_path}")
+            self.load_progress = (len(paths), len(paths))
+            if was_empty:
+                if isinstance(self.booking_list, CourtBookingList)\
+                        and self.booking_list.factory is None:
+                    # the columns of the snapshot become the court lists
+                    # without creating a reservation object for each row
+                    self.booking_list.courts = saved.courts
+                else:
+                    self.booking_list.extend(saved)
+                self.occupancy.extend(saved)
+                self.rendered.invalidate()
+                self.courts = max([self.courts, *saved.courts])
+                return 0
+            return self._extend(saved)
+        self.load_progress = (0, len(paths))
+        if processes == 1 or len(paths) <= 1:
+            results = map(read_file, paths)
+            skipped = self._merge_files(paths, results, log)
+        else:
+            # imported only when many files are read at once
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                results = executor.map(read_file, paths)
+                skipped = self._merge_files(paths, results, log)
+        # the snapshot holds only reservations from the files
+        if was_empty:
+            try:
+                write_snapshot(snapshot_path, self.booking_list, sources)
+            except OSError:
+                log(f'! {snapshot_path} could not be saved')
+        return skipped
+
+    @writing
+    def load_file(self, path, log=print, failed=None):
+        """
+        Load reservations from one csv or json file
+        Args:
+            <string> path - path to csv or json file
+            <function> log - called with every message about the file
+            <list> failed - the path is added to it when the file
+                has an error, optional
+        Return <int>:
+            number of skipped duplicates
+        """
+        path = Path(path)
+        return self._merge_files([path], [read_file(path)], log, failed)
+
+    def _merge_files(self, paths, results, log=print, failed=None):
+        """
+        Add reservations read from files to the schedule
+        Args:
+            <list> paths - paths to files
+            <iterable> results - return values of read_file for each path
+            <function> log - called with every message about the files
+            <list> failed - paths of the files with an error
+                are added to it, optional
+        Return <int>:
+            number of skipped duplicates
+        """
+        skipped = 0  # number of duplicates in all files
+        for loaded, (path, (reservations, error))\
+                in enumerate(zip(paths, results), 1):
+            log(f"Found: {path}")
+            if error is not None:
+                log(f'{path} upload failed ({error})')
+                if failed is not None:
+                    failed.append(path)
+            # saving reservations on the list
+            duplicates = self._extend(reservations)
+            if duplicates:
+                log(f'Skipped {duplicates} duplicates in {path}')
+            skipped += duplicates
+            self.load_progress = (loaded, len(paths))
+        return skipped
 
+    def start_loading(self, path_to_file, journal_path=None):
+        """
+        Load the schedule in a background thread
+        Methods of the schedule wait until it is loaded, messages about
+        the files are printed by the first one called
+        Args:
+            <string> path_to_file - path to folder with csv and json files
+            <string> journal_path - path to the journal replayed
+                after the files, None for no journal
+        """
+        self.load_messages = []  # messages about the files printed later
+        self.load_errors = []  # exception which stopped loading
+        self.load_error = None
+        started = threading.Event()  # set when the loader holds the lock
+
+        def load():
+            with self.lock.write():
+                started.set()
+                try:
+                    self.load_folder(path_to_file,
+                                     log=self.load_messages.append)
+                    if journal_path is not None:
+                        self.open_journal(journal_path)
+                except Exception as error:  # raised again by the reader
+                    self.load_errors.append(error)
+
+        self.loader = threading.Thread(target=load, name='schedule-loader',
+                                       daemon=True)
+        self.loader.start()
+        started.wait()
+
+    def loading_error(self):
+        """
+        Wait for the schedule loaded in the background and return
+        the error which stopped loading
+        Return <Exception>:
+            the error, None when the schedule is loaded
+        """
+        try:
+            self._ensure_loaded()
+        except Exception as error:  # the error saved by the loader
+            return error
+        return None
+
+    def _ensure_loaded(self):
+        """
+        Wait for the schedule loaded in the background showing the progress,
+        every call raises the exception which stopped loading
+        """
+        loader = self.loader
+        if loader is None or loader.ident == threading.get_ident():
+            if self.load_error is not None:
+                raise self.load_error
+            return
+        waited = False  # progress is shown only when the user waits
+        while loader.is_alive():
+            loaded, files = self.load_progress
+            print(f'\rLoading the schedule: {loaded}/{files} files',
+                  end='', flush=True)
+            waited = True
+            loader.join(PROGRESS_SECONDS)
+        if waited:
+            print()
+        if self.loader is loader:
+            if self.load_errors:
+                self.load_error = self.load_errors[0]
+            self.loader = None
+            for message in self.load_messages:
+                print(message)
+        # another thread may have already finished the loading
+        if self.load_error is not None:
+            raise self.load_error
+
+    @reading
     def print_schedule_output(self, start_date, end_date):
         """
         Print the schedule
@@ -297,16 +950,9 @@ class Schedule():
             <datetime> end_date - end date to print
         """
 
-        # the key of the dictionary is data, the value is the client's data
-        booking_dictionary = {}
         time_now = datetime.now()  # current system time
-        # sort the list to find last day
-        self.booking_list.sort(key=lambda x: x.end_date, reverse=True)
-        last_date_on_list = self.booking_list[0].end_date.date()
-
-        # sort the list by start date
-        self.booking_list.sort(key=lambda x: x.start_date)
-        first_date_on_list = self.booking_list[0].start_date.date()
+        # first and last date on the list
+        first_date_on_list, last_date_on_list = self.first_and_last_date()
         # first date to check
         if start_date < first_date_on_list:
             print(f'The first date on the schedule is '
@@ -314,30 +960,11 @@ class Schedule():
         if end_date > last_date_on_list:
             print(f'The last date on the schedule is '
                   f"{last_date_on_list.strftime('%d.%m.%Y')}")
-        one_day_reservations = []  # all bookings in one day
-        # iterating over reservations
-        for reservation in self.booking_list:
-            # date of the current reservation
-            date = (reservation.start_date).date()
-            # check if no bookings have been found for the day
-            for key, value in booking_dictionary.items():
-                if key == date:
-                    one_day_reservations = (value)
-            # search for new one
-            if start_date <= date <= end_date:
-                one_day_reservations.append(
-                    str(reservation.name + ' '
-                        + (reservation.start_date).strftime('%d.%m.%Y %H:%M')
-                        + ' - '
-                        + (reservation.end_date).strftime('%d.%m.%Y %H:%M')))
-            # save all reservations from one day to the dictionary
-            if len(one_day_reservations) != 0:
-                booking_dictionary.setdefault(
-                    date, one_day_reservations)
-                one_day_reservations = []
-        if len(booking_dictionary) == 0:
-            print('no reservations on selected dates')
-        for key, value in booking_dictionary.items():
+        days = 0  # number of days with reservations
+        for key, text in self._rendered_days(
+                max(start_date, first_date_on_list),
+                min(end_date, last_date_on_list)):
+            days += 1
             if time_now.date() == key:
                 print('Today')
             elif time_now.date() + timedelta(days=1) == key:
@@ -345,10 +972,69 @@ class Schedule():
             else:
                 day_of_week = key.strftime('%A')
                 print(day_of_week)
-            for reservation in value:
-                print(f'\t*{reservation}')
+            print(text, end='')
+        if days == 0:
+            print('no reservations on selected dates')
         return
 
+    def _rendered_days(self, start_date, end_date):
+        """
+        Return the printed reservations of every day between two days,
+        days missing from the cache are read at once and kept in it
+        Args:
+            <date> start_date - from that date
+            <date> end_date - by this date
+        Yield:
+            1)<date>
+                day with reservations
+            2)<string>
+                a line for every reservation of the day
+        """
+        # the court is shown only when the club has many courts
+        with_court = self.courts > 1
+        if (end_date - start_date).days >= self.rendered.size:
+            # a range longer than the cache is not kept in it
+            for key, value in self.reservations_by_day(start_date, end_date):
+                yield key, self._render_day(value, with_court)
+            return
+        days = [start_date + timedelta(days=offset)
+                for offset in range((end_date - start_date).days + 1)]
+        texts = {day: self.rendered.get(day, with_court) for day in days}
+        missing = [day for day in days if texts[day] is None]
+        if missing:
+            read = {key: self._render_day(value, with_court)
+                    for key, value
+                    in self.reservations_by_day(missing[0], missing[-1])}
+            for day in missing:
+                # days without reservations are kept as empty texts
+                texts[day] = read.get(day, '')
+                self.rendered.put(day, with_court, texts[day])
+        for day in days:
+            if texts[day]:
+                yield day, texts[day]
+
+    @staticmethod
+    def _render_day(reservations, with_court):
+        """
+        Format the reservations of one day
+        Args:
+            <iterable> reservations - reservations sorted by start date
+            <bool> with_court - show the number of the court
+        Return <string>:
+            a line for every reservation
+        """
+        lines = []
+        for reservation in reservations:
+            court = f' (court {reservation.court})' if with_court else ''
+            lines.append(
+                f'\t*{reservation.name} '
+                f"{reservation.start_date.strftime('%d.%m.%Y %H:%M')}"
+                ' - '
+                f"{reservation.end_date.strftime('%d.%m.%Y %H:%M')}"
+                f'{court}\n')
+        return ''.join(lines)
+
+    @reading
     def save_csv(self, start_date, end_date, filename):
         """
         Save the schedule to a csv file with a name provided by the client
@@ -359,8 +1045,8 @@ class Schedule():
         """
 
         date_format = '%d.%m.%Y'  # valid date format
-        # sort list by date
-        first_date_on_list, last_date_on_list = self.list_sort()
+        # first and last date on the list
+        first_date_on_list, last_date_on_list = self.first_and_last_date()
         # first date to check
         if start_date < first_date_on_list:
             print(f'First date on the list is '
@@ -371,53 +1057,97 @@ class Schedule():
         # Creates a file and writes a list to it
         with open(f'{filename}.csv', 'w', newline='', encoding='UTF-8')\
                 as csv_file:
-            writer = csv.writer(csv_file)
-            writer.writerow(['Name', ' start_time', ' end_time'])
-            # iterating over reservations
-            for reservation in self.booking_list:
-                # date of the current reservation
-                date = reservation.start_date.date()
-                # checking if there are reservations for that day
-                if start_date <= date <= end_date:
-                    name = reservation.name
-                    s_date = ' ' + (reservation.start_date).strftime(
-                        '%d.%m.%Y %H:%M')
-                    e_date = ' ' + \
-                        (reservation.end_date).strftime('%d.%m.%Y %H:%M')
-                    writer.writerow([name, s_date, e_date])
-
-    def list_sort(self):
-        """
-        sort list to find last date on the list
-        sort list to find first date on the list
+            write_csv(csv_file,
+                      self._reservations_in_chunks(start_date, end_date),
+                      self.courts > 1)
+
+    @reading
+    def first_and_last_date(self):
+        """
+        find last date on the list
+        find first date on the list
         Return:
             <datetime> first_date_on_list - from that date
             <datetime> last_date_on_list - by this date
 
         """
-        # sort the list to find last day
-        self.booking_list.sort(key=lambda x: x.end_date, reverse=True)
-        last_date_on_list = self.booking_list[0].end_date.date()
+        # find last day
+        last_date_on_list = self.booking_list.last_end().date()
 
-        # sort the list by start date
-        self.booking_list.sort(key=lambda x: x.start_date)
-        first_date_on_list = self.booking_list[0].start_date.date()
+        # find first day
+        first_date_on_list = self.booking_list.first_start().date()
         return first_date_on_list, last_date_on_list
 
-    def save_json(self, start_date, end_date, filename):
+    @reading
+    def reservations_between(self, start_date, end_date):
+        """
+        Return reservations starting between two days
+        Args:
+            <date> start_date - from that date
+            <date> end_date - by this date
+        Return <list>:
+            reservations sorted by start date
+        """
+        start_date = datetime.combine(start_date, time.min)
+        try:
+            end_date = datetime.combine(end_date + timedelta(days=1),
+                                        time.min)
+        except OverflowError:
+            end_date = None
+        return self.booking_list.between(start_date, end_date)
+
+    def reservations_by_day(self, start_date, end_date):
+        """
+        Group reservations starting between two days by day
+        Reservations are read CHUNK_DAYS days at a time,
+        so a long range does not have to fit in memory
+        Args:
+            <date> start_date - from that date
+            <date> end_date - by this date
+        Return <groupby>:
+            pairs of a day with reservations and an iterator
+            over reservations from that day sorted by start date
+        """
+        return groupby(self._reservations_in_chunks(start_date, end_date),
+                       key=lambda reservation: reservation.start_date.date())
+
+    def _reservations_in_chunks(self, start_date, end_date):
+        """
+        Read reservations starting between two days in chunks
+        Args:
+            <date> start_date - from that date
+            <date> end_date - by this date
+        Yield <ClientReservation>:
+            reservations sorted by start date
+        """
+        if self.is_empty():
+            return
+        # days without reservations are not read
+        first_date_on_list, last_date_on_list = self.first_and_last_date()
+        start_date = max(start_date, first_date_on_list)
+        end_date = min(end_date, last_date_on_list)
+        while start_date <= end_date:
+            chunk_end = end_date
+            if (end_date - start_date).days >= CHUNK_DAYS:
+                chunk_end = start_date + timedelta(days=CHUNK_DAYS - 1)
+            yield from self.reservations_between(start_date, chunk_end)
+            start_date = chunk_end + timedelta(days=1)
+
+    @reading
+    def save_json(self, start_date, end_date, filename,
+                  json_format=JSON_INDENTED):
         """
         Save the schedule to a json file with a name provided by the client
         Args:
             <datetime> start_date - from that date
             <datetime> end_date - by this date
+            <string> json_format - JSON_INDENTED, JSON_COMPACT
+                or JSON_LINES saved with the .ndjson extension
         """
 
         date_format = '%d.%m.%Y'  # valid date format
-        booking_dictionary = {}  # dictionary of client_reservation object
-        one_client = {}  # client data dictionary
-        one_day_reservations = []  # one day booking list
-        # sort list by date
-        first_date_on_list, last_date_on_list = self.list_sort()
+        # first and last date on the list
+        first_date_on_list, last_date_on_list = self.first_and_last_date()
         if start_date < first_date_on_list:
             print('First date on the list is '
                   f'{first_date_on_list.strftime(date_format)}')
@@ -425,69 +1155,53 @@ class Schedule():
             print(f'Last date on the list is '
                   f'{last_date_on_list.strftime(date_format)}')
 
-        # iterating over reservations
-        for reservation in self.booking_list:
-            # date of the current reservation
-            date = reservation.start_date.date()
-            # check if no bookings have been found for the day
-            for key, value in booking_dictionary.items():
-                if datetime.strptime(key, date_format).date() == date:
-                    one_day_reservations = value
-            # search for new one
-            if start_date <= date <= end_date:
-                one_client['name'] = str(reservation.name)
-                _, s_time = ((reservation.start_date).strftime(
-                    '%d.%m.%Y %H:%M')).split(' ')
-                one_client['start_time'] = s_time
-                _, e_time = ((reservation.end_date).strftime(
-                    '%d.%m.%Y %H:%M')).split(' ')
-                one_client['end_time'] = e_time
-                one_day_reservations.append(one_client)
-                one_client = {}
-            if len(one_day_reservations) != 0:
-                booking_dictionary[
-                    date.strftime(date_format)] = one_day_reservations
-                one_day_reservations = []
-
-        # Creates a file and writes a dictionary to it
-        with open(f'{filename}.json', 'w', encoding='UTF-8')\
+        # days are written one by one as they are read
+        extension = 'ndjson' if json_format == JSON_LINES else 'json'
+        with open(f'{filename}.{extension}', 'w', encoding='UTF-8')\
                 as json_file:
-            json.dump(booking_dictionary,
-                      json_file,
-                      ensure_ascii=False,
-                      indent=4)
+            write_json(json_file,
+                       self.reservations_by_day(start_date, end_date),
+                       json_format, self.courts > 1)
 
+    @writing
     def make_backup(self):
         """
-        saves the schedule to a csv file when closing the program
+        saves the schedule to a csv file when closing the program,
+        refreshes the snapshot and compacts the journal
+        The backup is saved in the folder the schedule was loaded from,
+        or next to the journal when no folder was loaded
         """
-        # sort list by date
-        start_date, end_date = self.list_sort()
-
-        date_format = '%d.%m.%Y'  # valid date format
-        # sort list by date
-        first_date_on_list, last_date_on_list = self.list_sort()
-        # first date to check
-        if start_date < first_date_on_list:
-            print(f'First date on the list is '
-                  f' {first_date_on_list.strftime(date_format)}')
-        if end_date > last_date_on_list:
-            print(f'Last date on the list is '
-                  f'{last_date_on_list.strftime(date_format)}')
+        if self.sources is not None:
+            folder = Path(self.sources[0])
+        elif self.journal is not None:
+            folder = Path(self.journal.path).parent
+        else:
+            folder = Path('schedule')
+        path = folder / BACKUP_NAME  # path to the backup
         # Creates a file and writes a list to it
-        with open(f'schedule/last_session.csv', 'w', newline='', encoding='UTF-8')\
+        with open(f'{path}.tmp', 'w', newline='', encoding='UTF-8')\
                 as csv_file:
-            writer = csv.writer(csv_file)
-            writer.writerow(['Name', ' start_time', ' end_time'])
-            # iterating over reservations
-            for reservation in self.booking_list:
-                # date of the current reservation
-                date = reservation.start_date.date()
-                # checking if there are reservations for that day
-                if start_date <= date <= end_date:
-                    name = reservation.name
-                    s_date = ' ' + (reservation.start_date).strftime(
-                        '%d.%m.%Y %H:%M')
-                    e_date = ' ' + \
-                        (reservation.end_date).strftime('%d.%m.%Y %H:%M')
-                    writer.writerow([name, s_date, e_date])
+            # all reservations sorted by date
+            write_csv(csv_file,
+                      self._reservations_in_chunks(date.min, date.max),
+                      self.courts > 1)
+            csv_file.flush()
+            os.fsync(csv_file.fileno())
+        # the old backup is replaced only by a complete one
+        os.replace(f'{path}.tmp', path)
+        # the next start loads the snapshot unless other files change
+        if self.sources is not None:
+            sources = self.sources[1]
+            try:
+                write_snapshot(folder / SNAPSHOT_NAME, self.booking_list,
+                               sources)
+            except OSError:
+                print(f'! {folder / SNAPSHOT_NAME} could not be saved')
+        if self.journal is not None:
+            # the files loaded at the next start still have the cancelled
+            # reservations, so their cancellations are kept
+            self.journal.compact(
+                lambda reservation: not self._court_list(
+                    reservation.court).contains(reservation.name,
+                                                reservation.start_date,
+                                                reservation.end_date))
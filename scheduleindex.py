@@ -0,0 +1,438 @@
+"""
+Recruitment Task
+This script holds a sorted index of the reservation dates
+used to find free dates without scanning the whole schedule
+a counter of the client's bookings in each week
+a set of the reservations used to find duplicates
+and a map used to find a client's reservation by its start date
+Author: Piotr Wołoszyk
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import datetime, timedelta
+
+REMOVED = datetime.min  # end date of a removed reservation in the index
+
+
+def find_free(starts, ends, longest, date, length, removed=None):
+    """
+    Find the first free date with a window of the given length
+    Works with dates and timedeltas as well as with numbers of minutes
+    Args:
+        <list> starts - start dates of the reservations in ascending order
+        <list> ends - end dates, ends[i] belongs to starts[i]
+        <timedelta> longest - the longest reservation in starts
+        <datetime> date - the earliest date to check
+        <timedelta> length - length of the window
+        <datetime> removed - end of the reservations which were removed,
+            None when there are none
+    Return:
+        1)<datetime>
+            first date from which the court is free for given time
+        2)<int>
+            position of the first reservation after the free window
+    """
+    index = bisect_right(starts, date)
+    # only reservations shorter than the longest one can cover the date
+    earlier = index - 1
+    while earlier >= 0 and starts[earlier] > date - longest:
+        if ends[earlier] > date:
+            date = ends[earlier]
+        earlier -= 1
+    # skip the reservations that do not leave enough time before them
+    while index < len(starts) and starts[index] < date + length:
+        date = max(date, ends[index])
+        index += 1
+    # removed reservations do not end the window
+    while index < len(starts) and ends[index] == removed:
+        index += 1
+    return date, index
+
+
+def find_free_windows(starts, ends, longest, date, length, count,
+                      removed=None):
+    """
+    Find the next free windows of at least the given length
+    The reservations after the date are walked only once
+    Args:
+        <list> starts - start dates of the reservations in ascending order
+        <list> ends - end dates, ends[i] belongs to starts[i]
+        <timedelta> longest - the longest reservation in starts
+        <datetime> date - the earliest date to check
+        <timedelta> length - the shortest window
+        <int> count - the largest number of windows
+        <datetime> removed - end of the reservations which were removed,
+            None when there are none
+    Return <list>:
+        (start, end) of every window, end is None when
+        the court is free from start on
+    """
+    windows = []
+    date, index = find_free(starts, ends, longest, date, length, removed)
+    while len(windows) < count:
+        if index == len(starts):
+            windows.append((date, None))
+            break
+        windows.append((date, starts[index]))
+        date = ends[index]
+        index += 1
+        # skip the reservations that do not leave enough time before them
+        while index < len(starts) and starts[index] < date + length:
+            date = max(date, ends[index])
+            index += 1
+        while index < len(starts) and ends[index] == removed:
+            index += 1
+    return windows
+
+
+def window_size(free_time, minute):
+    """
+    Check how long the court will be available
+    Args:
+        <timedelta> free_time - time to the next reservation
+        <timedelta> minute - one minute in units of free_time
+    Return <int>:
+        2 if court will be available for 1,5h
+        1 if court will be available for 1h
+        0 if court will be available for 0,5h
+    """
+    if free_time >= 90 * minute:
+        return 2
+    if free_time >= 60 * minute:
+        return 1
+    return 0
+
+
+class ScheduleIndex():
+    """
+    Sorted index of the start and end dates of all reservations
+    number of reservations per client in every ISO week
+    all reservations to find duplicates
+    and reservations by (name, start_date) to find them without a scan
+    A removed reservation stays in the lists with the REMOVED end date
+    until they are compacted, so removing does not move the others
+    Attributes:
+        reservations : <list>
+            all reservations sorted by start date
+        starts : <list>
+            start dates, starts[i] belongs to reservations[i]
+        ends : <list>
+            end dates, ends[i] belongs to reservations[i]
+        removed : <int>
+            number of removed reservations still in the lists
+        first : <int>
+            position of the first reservation which is not removed
+        longest : <timedelta>
+            the longest reservation ever indexed
+        week_counts : <Counter>
+            number of reservations for (name, ISO year, ISO week)
+        keys : <Counter>
+            number of copies of each (name, start_date, end_date),
+            the court is not a part of it
+        by_name_start : <dict>
+            list of reservations for (name, start_date)
+    Methods:
+        add():
+            Add a reservation to the index
+        remove():
+            Remove a reservation from the index
+        rebuild():
+            Build the index again from a list of reservations
+        next_free():
+            Find the first free date with a window of the given length
+        free_window():
+            Check if a date is free and how long will be
+        free_windows():
+            Find the next free windows of at least the given length
+        week_count():
+            Count the client's reservations in the week of a date
+        contains():
+            Check if the reservation is already in the index
+        find():
+            Find the client's reservation starting at a date
+        between():
+            Return reservations starting in a range of dates
+        first_start():
+            Return the start date of the first reservation
+        last_end():
+            Return the end date of the reservation that ends last
+    """
+
+    def __init__(self):
+        self.reservations = []
+        self.starts = []
+        self.ends = []
+        self.removed = 0
+        self.first = 0
+        self.longest = timedelta(0)
+        self.week_counts = Counter()
+        self.keys = Counter()
+        self.by_name_start = {}
+
+    @staticmethod
+    def week_key(name, date):
+        """
+        Return the key of the client's week in week_counts
+        Args:
+            <string> name - client's name
+            <datetime> date - any date in the week
+        """
+        year, week, _ = date.isocalendar()
+        return name, year, week
+
+    @staticmethod
+    def booking_key(reservation):
+        """
+        Return the key of the reservation in keys
+        Args:
+            <ClientReservation> reservation - indexed reservation
+        """
+        return reservation.name, reservation.start_date, reservation.end_date
+
+    def __len__(self):
+        return len(self.starts) - self.removed
+
+    def add(self, reservation):
+        """
+        Add a reservation to the index
+        Args:
+            <ClientReservation> reservation - reservation to add
+        """
+        index = bisect_right(self.reservations, reservation)
+        self.reservations.insert(index, reservation)
+        self.starts.insert(index, reservation.start_date)
+        self.ends.insert(index, reservation.end_date)
+        if index <= self.first:
+            self.first = index
+        self.longest = max(self.longest,
+                           reservation.end_date - reservation.start_date)
+        self.week_counts[self.week_key(reservation.name,
+                                       reservation.start_date)] += 1
+        self.keys[self.booking_key(reservation)] += 1
+        self.by_name_start.setdefault(
+            (reservation.name, reservation.start_date), []).append(reservation)
+
+    def remove(self, reservation):
+        """
+        Remove a reservation from the index
+        It is only marked as removed, the lists are compacted when
+        half of them are removed reservations
+        Args:
+            <ClientReservation> reservation - reservation to remove
+        """
+        index = None  # position of the reservation
+        same = bisect_left(self.reservations, reservation)
+        while same < len(self.reservations)\
+                and self.reservations[same] == reservation:
+            if self.ends[same] != REMOVED:
+                # prefer the same object when the reservation is duplicated
+                if index is None or self.reservations[same] is reservation:
+                    index = same
+                if self.reservations[same] is reservation:
+                    break
+            same += 1
+        if index is None:
+            return
+        self.ends[index] = REMOVED
+        self.removed += 1
+        # removed reservations at the end are dropped at once
+        while self.ends and self.ends[-1] == REMOVED:
+            self.reservations.pop()
+            self.starts.pop()
+            self.ends.pop()
+            self.removed -= 1
+        while self.first < len(self.ends)\
+                and self.ends[self.first] == REMOVED:
+            self.first += 1
+        if self.removed * 2 > len(self.ends):
+            self._compact()
+        key = self.week_key(reservation.name, reservation.start_date)
+        self.week_counts[key] -= 1
+        if self.week_counts[key] <= 0:
+            del self.week_counts[key]
+        key = self.booking_key(reservation)
+        self.keys[key] -= 1
+        if self.keys[key] <= 0:
+            del self.keys[key]
+        key = reservation.name, reservation.start_date
+        same_start = self.by_name_start[key]
+        for position, indexed in enumerate(same_start):
+            if indexed is reservation:
+                del same_start[position]
+                break
+        else:
+            same_start.remove(reservation)
+        if not same_start:
+            del self.by_name_start[key]
+
+    def _compact(self):
+        """
+        Drop the removed reservations from the lists
+        """
+        kept = [position for position, end in enumerate(self.ends)
+                if end != REMOVED]
+        self.reservations = [self.reservations[position]
+                             for position in kept]
+        self.starts = [self.starts[position] for position in kept]
+        self.ends = [self.ends[position] for position in kept]
+        self.removed = 0
+        self.first = 0
+
+    def rebuild(self, reservations):
+        """
+        Build the index again from a list of reservations
+        Args:
+            <list> reservations - list of ClientReservation objects
+        """
+        self.reservations = sorted(reservations)
+        self.starts = [reservation.start_date
+                       for reservation in self.reservations]
+        self.ends = [reservation.end_date
+                     for reservation in self.reservations]
+        self.removed = 0
+        self.first = 0
+        self.longest = max((end - start
+                            for start, end in zip(self.starts, self.ends)),
+                           default=timedelta(0))
+        self.week_counts = Counter(
+            self.week_key(reservation.name, reservation.start_date)
+            for reservation in reservations)
+        self.keys = Counter(self.booking_key(reservation)
+                            for reservation in reservations)
+        self.by_name_start = {}
+        for reservation in reservations:
+            self.by_name_start.setdefault(
+                (reservation.name, reservation.start_date),
+                []).append(reservation)
+
+    def next_free(self, date, minutes):
+        """
+        Find the first free date with a window of the given length
+        Args:
+            <datetime> date - the earliest date to check
+            <int> minutes - length of the window
+        Return:
+            1)<datetime>
+                first date from which the court is free for given minutes
+            2)<int>
+                position of the first reservation after the free window
+        """
+        return find_free(self.starts, self.ends, self.longest,
+                         date, timedelta(minutes=minutes), REMOVED)
+
+    def free_window(self, date):
+        """
+        Check if a date is free and how long will be
+        Args:
+            <datetime> date - date provided by the client
+        Return:
+            1)<datetime>
+                first date with at least 0,5h free
+            2)<int>
+                2 if court will be available for 1,5h
+                1 if court will be available for 1h
+                0 if court will be available for 0,5h
+        """
+        date, index = self.next_free(date, 30)
+        if index == len(self.starts):
+            return date, 2
+        return date, window_size(self.starts[index] - date,
+                                 timedelta(minutes=1))
+
+    def free_windows(self, date, minutes, count):
+        """
+        Find the next free windows of at least the given length
+        Args:
+            <datetime> date - the earliest date to check
+            <int> minutes - the shortest window
+            <int> count - the largest number of windows
+        Return <list>:
+            (start, end) dates of every window, end is None
+            when the court is free from start on
+        """
+        return find_free_windows(self.starts, self.ends, self.longest,
+                                 date, timedelta(minutes=minutes), count,
+                                 REMOVED)
+
+    def week_count(self, name, date):
+        """
+        Count the client's reservations in the week of a date
+        Args:
+            <string> name - client's name
+            <datetime> date - any date in the week
+        Return <int>
+        """
+        return self.week_counts[self.week_key(name, date)]
+
+    def contains(self, name, start_date, end_date):
+        """
+        Check if the reservation is already in the index
+        Args:
+            <string> name - client's name
+            <datetime> start_date - reservation start date
+            <datetime> end_date - reservation end date
+        Return <bool>
+        """
+        return (name, start_date, end_date) in self.keys
+
+    def find(self, name, start_date):
+        """
+        Find the client's reservation starting at a date
+        Args:
+            <string> name - client's name
+            <datetime> start_date - reservation start date
+        Return <ClientReservation>:
+            found reservation or None
+        """
+        same_start = self.by_name_start.get((name, start_date))
+        if not same_start:
+            return None
+        return same_start[0]
+
+    def between(self, start_date=None, end_date=None):
+        """
+        Return reservations starting in a range of dates
+        Args:
+            <datetime> start_date - the earliest start, None for no limit
+            <datetime> end_date - reservations start before it,
+                None for no limit
+        Return <list>:
+            reservations sorted by start date
+        """
+        first = 0 if start_date is None\
+            else bisect_left(self.starts, start_date)
+        last = len(self.starts) if end_date is None\
+            else bisect_left(self.starts, end_date)
+        if not self.removed:
+            return self.reservations[first:last]
+        return [self.reservations[position] for position in range(first, last)
+                if self.ends[position] != REMOVED]
+
+    def first_start(self):
+        """
+        Return the start date of the first reservation
+        Return <datetime>:
+            start date, None if the index is empty
+        """
+        if not self.starts:
+            return None
+        return self.starts[self.first]
+
+    def last_end(self):
+        """
+        Return the end date of the reservation that ends last
+        Return <datetime>:
+            end date, None if the index is empty
+        """
+        if not self.starts:
+            return None
+        # only reservations shorter than the longest one can end later,
+        # the last one is never removed and removed ones end before it
+        position = len(self.starts) - 1
+        last_end = self.ends[position]
+        while position >= 0\
+                and self.starts[position] >= self.starts[-1] - self.longest:
+            last_end = max(last_end, self.ends[position])
+            position -= 1
+        return last_end
@@ -0,0 +1,304 @@
+"""
+Recruitment Task
+This script serves the schedule to many clients at once over TCP,
+every request and every answer is one line of json
+Author: Piotr Wołoszyk
+"""
+
+import asyncio
+import io
+import json
+import sys
+from datetime import datetime, timedelta
+
+from additionalexceptions import BookingError, DateTaken, RequestError
+from consts import JSON_COMPACT, JSON_INDENTED, JSON_LINES, LENGTHS
+from csvwriter import write_csv
+from dateformat import DATE_TIME_FORMAT, parse_date_time
+from jsonwriter import write_json
+from reservation import name_error
+from schedule import Schedule
+
+DATE_FORMAT = '%d.%m.%Y'  # format of the days in list and export requests
+LINE_LIMIT = 64 * 1024  # the longest request in bytes
+# formats of the export request and json formats they are saved in
+EXPORT_FORMATS = {'json': JSON_INDENTED, 'compact': JSON_COMPACT,
+                  'ndjson': JSON_LINES}
+
+
+class BookingService():
+    """
+    TCP service which makes, cancels, lists and exports reservations
+    Requests are json objects with an "op" key, one in every line:
+        {"op": "make", "name": ..., "start": "DD.MM.YYYY HH:MM",
+         "minutes": 30, 60 or 90, "court": optional number}
+        {"op": "cancel", "name": ..., "start": "DD.MM.YYYY HH:MM"}
+        {"op": "list", "start": "DD.MM.YYYY", "end": "DD.MM.YYYY"}
+        {"op": "export", "start": ..., "end": ..., "format": "csv",
+         "json", "compact" or "ndjson"}
+    Every answer has "ok" set to true or false with an "error" message
+    Requests are answered in worker threads, the schedule has its own
+    lock, so a long export does not stop the other clients
+    Attributes:
+        schedule : <Schedule>
+            schedule shared by all clients
+        server : <Server>
+            running server, None before start()
+    Methods:
+        start():
+            Start listening on a host and port
+        serve_forever():
+            Serve clients until the service is cancelled
+        close():
+            Stop the server
+        handle():
+            Answer one request
+    """
+
+    def __init__(self, schedule):
+        self.schedule = schedule
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=8765):
+        """
+        Start listening on a host and port
+        Args:
+            <string> host - address to listen on
+            <int> port - port to listen on, 0 picks a free one
+        Return <int>:
+            port the service listens on
+        """
+        self.server = await asyncio.start_server(
+            self._client, host, port, limit=LINE_LIMIT, backlog=4096)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """
+        Serve clients until the service is cancelled
+        """
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        """
+        Stop the server
+        """
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _client(self, reader, writer):
+        """
+        Answer all requests of one connection
+        Args:
+            <StreamReader> reader - requests of the client
+            <StreamWriter> writer - answers to the client
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    answer = await self.handle(json.loads(line))
+                except ValueError as error:
+                    answer = {'ok': False, 'error': f'bad request: {error}'}
+                writer.write(json.dumps(answer, ensure_ascii=False)
+                             .encode('UTF-8') + b'\n')
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            # the connection is lost or the line is too long
+            pass
+        finally:
+            writer.close()
+
+    async def handle(self, request):
+        """
+        Answer one request
+        Args:
+            <dict> request - decoded request
+        Return <dict>:
+            answer with "ok" and the result or an "error" message
+        """
+        operations = {'make': self._make, 'cancel': self._cancel,
+                      'list': self._list, 'export': self._export}
+        try:
+            operation = operations[request['op']]
+            return {'ok': True,
+                    **await asyncio.to_thread(operation, request)}
+        except RequestError as error:
+            return {'ok': False, 'error': str(error)}
+        except (KeyError, TypeError, ValueError, OverflowError) as error:
+            return {'ok': False,
+                    'error': f'bad request: {type(error).__name__}: {error}'}
+
+    @staticmethod
+    def _name(request):
+        """
+        Return the client's name of a request
+        Args:
+            <dict> request - request with a "name"
+        Return <string>
+        """
+        if not isinstance(request['name'], str):
+            raise RequestError('The name must be a string')
+        return request['name'].strip()
+
+    @staticmethod
+    def _future_date(text):
+        """
+        Parse a date at least one hour from now
+        Args:
+            <string> text - date in {DD.MM.YYYY HH:MM} format
+        Return <datetime>
+        """
+        date = parse_date_time(text)
+        if datetime.now() + timedelta(minutes=60) >= date:
+            raise RequestError("It's already to late to book this")
+        return date
+
+    @staticmethod
+    def _day_range(request):
+        """
+        Parse the first and the last day of a request
+        Args:
+            <dict> request - request with "start" and "end" days
+        Return:
+            1)<date>
+                the first day
+            2)<date>
+                the last day
+        """
+        start_date = datetime.strptime(request['start'], DATE_FORMAT).date()
+        end_date = datetime.strptime(request['end'], DATE_FORMAT).date()
+        if start_date > end_date:
+            raise RequestError('The start date is older than the end date')
+        return start_date, end_date
+
+    def _make(self, request):
+        """
+        Make a reservation on the requested court or on any free one
+        Args:
+            <dict> request - make request
+        Return <dict>:
+            number of the booked court
+        """
+        name = self._name(request)
+        error = name_error(name)
+        if error is not None:
+            raise RequestError(error.strip('! '))
+        start_date = self._future_date(request['start'])
+        minutes = int(request.get('minutes', 60))
+        if minutes not in LENGTHS:
+            raise RequestError(f'minutes must be one of {LENGTHS}')
+        courts = range(1, self.schedule.courts + 1)
+        if request.get('court') is not None:
+            if int(request['court']) not in courts:
+                raise RequestError('There is no such court')
+            courts = [int(request['court'])]
+        for court in courts:
+            # the date is checked and booked at once under the lock
+            # of the schedule
+            try:
+                self.schedule.book(name, start_date, minutes, court)
+                return {'court': court}
+            except DateTaken:
+                continue
+            except BookingError as error:
+                raise RequestError(str(error)) from error
+        message = 'The time you chose is unavailable'
+        next_free = self.schedule.next_free_date(start_date, minutes,
+                                                 courts[0])
+        if next_free is not None:
+            message += (', the court is free at '
+                        f'{next_free.strftime(DATE_TIME_FORMAT)}')
+        raise RequestError(message)
+
+    def _cancel(self, request):
+        """
+        Cancel a reservation
+        Args:
+            <dict> request - cancel request
+        Return <dict>:
+            number of the court of the cancelled reservation
+        """
+        name = self._name(request)
+        start_date = parse_date_time(request['start'])
+        if datetime.now() + timedelta(minutes=60) >= start_date:
+            raise RequestError('Is too late to cancel')
+        reservation = self.schedule.reservation_exists(name, start_date)
+        if reservation is None:
+            raise RequestError('Reservation does not exist')
+        self.schedule.delete_reservation(reservation, quiet=True)
+        return {'court': reservation.court}
+
+    def _list(self, request):
+        """
+        List reservations starting between two days
+        Args:
+            <dict> request - list request
+        Return <dict>:
+            reservations sorted by start date
+        """
+        start_date, end_date = self._day_range(request)
+        return {'reservations': [
+            {'name': reservation.name,
+             'start': reservation.start_date.strftime(DATE_TIME_FORMAT),
+             'end': reservation.end_date.strftime(DATE_TIME_FORMAT),
+             'court': reservation.court}
+            for reservation in self.schedule.reservations_between(
+                start_date, end_date)]}
+
+    def _export(self, request):
+        """
+        Export reservations starting between two days as a file content
+        Args:
+            <dict> request - export request
+        Return <dict>:
+            content of the csv or json file
+        """
+        start_date, end_date = self._day_range(request)
+        export_format = request.get('format', 'csv')
+        if export_format != 'csv' and export_format not in EXPORT_FORMATS:
+            raise RequestError(f'Unknown format {export_format}')
+        data = io.StringIO(newline='')
+        if export_format == 'csv':
+            write_csv(data, self.schedule.reservations_between(start_date,
+                                                               end_date),
+                      self.schedule.courts > 1)
+        else:
+            write_json(data,
+                       self.schedule.reservations_by_day(start_date,
+                                                         end_date),
+                       EXPORT_FORMATS[export_format],
+                       self.schedule.courts > 1)
+        return {'data': data.getvalue()}
+
+
+async def serve(host, port):
+    """
+    Load the schedule and serve it until the program is stopped
+    Args:
+        <string> host - address to listen on
+        <int> port - port to listen on
+    """
+    path_to_file = 'schedule'  # path to folder with csv and json file
+    sch = Schedule()
+    sch.load_folder(path_to_file)
+    # changes made after the last backup
+    sch.open_journal(f'{path_to_file}/session.journal')
+    service = BookingService(sch)
+    port = await service.start(host, port)
+    print(f'Serving on {host}:{port}')
+    try:
+        await service.serve_forever()
+    finally:
+        sch.make_backup()
+        sch.journal.close()
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(serve(sys.argv[1] if len(sys.argv) > 1 else '127.0.0.1',
+                          int(sys.argv[2]) if len(sys.argv) > 2 else 8765))
+    except KeyboardInterrupt:
+        pass
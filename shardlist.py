@@ -0,0 +1,430 @@
+"""
+Recruitment Task
+This script holds a container of the bookings split into one shard
+for every month, each shard is saved in its own file and loaded
+only when a query needs it
+Author: Piotr Wołoszyk
+"""
+
+import os
+from collections import OrderedDict
+from datetime import timedelta
+from pathlib import Path
+
+from bookinglist import BookingList
+from clientreservation import ClientReservation
+from courtlist import CourtBookingList
+from csvwriter import write_csv
+from dateformat import DATE_TIME_FORMAT, parse_date_time
+from scheduleindex import window_size
+
+SHARD_CACHE = 6  # the most shards kept in memory at once
+INDEX_NAME = 'shards.index'  # file with the summary of every shard
+
+
+def month_key(date):
+    """
+    Return the shard of a date
+    Args:
+        <datetime> date - any date in the month
+    Return <tuple>:
+        (year, month)
+    """
+    return date.year, date.month
+
+
+def court_shards(folder, cache_size=SHARD_CACHE):
+    """
+    Return a booking list of many courts, every court is split by month
+    into its own subfolder
+    Args:
+        <string> folder - folder with a subfolder of every court
+        <int> cache_size - the most shards of a court kept in memory
+    Return <CourtBookingList>
+    """
+    folder = Path(folder)
+    booking_list = CourtBookingList(lambda court: MonthShardedList(
+        folder / f'court{court}', cache_size, court))
+    # courts saved before are known without waiting for a query
+    for path in folder.glob('court*'):
+        booking_list.court_list(int(path.name[len('court'):]))
+    return booking_list
+
+
+class MonthShardedList():
+    """
+    Container of the bookings split by the month of the start date,
+    it has the same methods as BookingList
+    Every change is written at once to the csv file of its month,
+    queries load only the shards which overlap their dates and
+    the shards used least recently are dropped from memory
+    Attributes:
+        folder : <Path>
+            folder with the file of every shard
+        cache_size : <int>
+            the most shards kept in memory
+        court : <int>
+            number of the court all reservations are made for
+        shards : <dict>
+            (count, first start, last end) of every shard by its month,
+            kept for all shards so they are not loaded to be skipped
+        loaded : <OrderedDict>
+            BookingList of the shards in memory, least recently used first
+    Methods:
+        append():
+            Add a reservation
+        extend():
+            Add many reservations at once
+        remove():
+            Remove a reservation
+        find():
+            Find the client's reservation starting at a date
+        contains():
+            Check if the reservation is already on the list
+        week_count():
+            Count the client's reservations in the week of a date
+        next_free():
+            Find the first free date with a window of the given length
+        free_window():
+            Check if a date is free and how long will be
+        free_windows():
+            Find the next free windows of at least the given length
+        between():
+            Return reservations starting in a range of dates
+        first_start():
+            Return the start date of the first reservation
+        last_end():
+            Return the end date of the reservation that ends last
+    """
+
+    def __init__(self, folder, cache_size=SHARD_CACHE, court=1):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.cache_size = cache_size
+        self.court = court
+        self.shards = {}
+        self.loaded = OrderedDict()
+        self._read_index()
+
+    def __len__(self):
+        return sum(count for count, _, _ in self.shards.values())
+
+    def __iter__(self):
+        for key in sorted(self.shards):
+            yield from self._shard(key)
+
+    def _path(self, key):
+        """
+        Return the path to the file of a shard
+        Args:
+            <tuple> key - (year, month) of the shard
+        Return <Path>
+        """
+        return self.folder / f'{key[0]:04d}-{key[1]:02d}.csv'
+
+    def _read_index(self):
+        """
+        Read the summary of every shard, shards missing from the index
+        are loaded once to find it
+        """
+        index_path = self.folder / INDEX_NAME
+        if index_path.exists():
+            with open(index_path, 'r', encoding='UTF-8') as index_file:
+                for line in index_file:
+                    month, count, first, last = line.rstrip('\n').split(',')
+                    key = tuple(int(part) for part in month.split('-'))
+                    if self._path(key).exists():
+                        self.shards[key] = (int(count),
+                                            parse_date_time(first),
+                                            parse_date_time(last))
+        for path in self.folder.glob('*-*.csv'):
+            key = tuple(int(part) for part in path.stem.split('-'))
+            if key not in self.shards:
+                self._summarize(key, self._shard(key))
+
+    def _write_index(self):
+        """
+        Save the summary of every shard, the old index is replaced
+        only by a complete one
+        """
+        index_path = self.folder / INDEX_NAME
+        with open(f'{index_path}.tmp', 'w', encoding='UTF-8') as index_file:
+            for key, (count, first, last) in sorted(self.shards.items()):
+                index_file.write(f'{key[0]:04d}-{key[1]:02d},{count},'
+                                 f'{first.strftime(DATE_TIME_FORMAT)},'
+                                 f'{last.strftime(DATE_TIME_FORMAT)}\n')
+        os.replace(f'{index_path}.tmp', index_path)
+
+    def _summarize(self, key, shard):
+        """
+        Remember the count, the first start and the last end of a shard
+        Args:
+            <tuple> key - (year, month) of the shard
+            <BookingList> shard - reservations of the shard
+        """
+        if len(shard):
+            self.shards[key] = (len(shard), shard.first_start(),
+                                shard.last_end())
+        else:
+            self.shards.pop(key, None)
+
+    def _shard(self, key):
+        """
+        Return the reservations of a month, load them if they are not
+        in memory and drop the least recently used shard
+        Args:
+            <tuple> key - (year, month) of the shard
+        Return <BookingList>
+        """
+        shard = self.loaded.get(key)
+        if shard is not None:
+            self.loaded.move_to_end(key)
+            return shard
+        shard = BookingList()
+        if self._path(key).exists():
+            shard.extend(self._read_shard(self._path(key)))
+        self.loaded[key] = shard
+        if len(self.loaded) > self.cache_size:
+            self.loaded.popitem(last=False)
+        return shard
+
+    def _read_shard(self, path):
+        """
+        Read reservations from the file of a shard
+        Args:
+            <Path> path - path to the csv file
+        Yield <ClientReservation>
+        """
+        import csv
+        cache = {}  # dates already parsed in this file
+        with open(path, 'r', newline='', encoding='UTF-8') as csv_file:
+            rows = csv.reader(csv_file)
+            _ = next(rows, None)
+            for row in rows:
+                yield ClientReservation(row[0].strip(),
+                                        parse_date_time(row[1].strip(), cache),
+                                        parse_date_time(row[2].strip(), cache),
+                                        self.court)
+
+    def _save(self, key, shard):
+        """
+        Write a changed shard to its file and update the index
+        Args:
+            <tuple> key - (year, month) of the shard
+            <BookingList> shard - reservations of the shard
+        """
+        path = self._path(key)
+        self._summarize(key, shard)
+        if key not in self.shards:
+            # the last reservation of the month was removed
+            if path.exists():
+                os.remove(path)
+        else:
+            with open(f'{path}.tmp', 'w', newline='', encoding='UTF-8')\
+                    as csv_file:
+                write_csv(csv_file, shard.between())
+            os.replace(f'{path}.tmp', path)
+        self._write_index()
+
+    def _overlapping(self, start_date, end_date):
+        """
+        Return the shards with reservations overlapping a range of dates
+        Args:
+            <datetime> start_date - start of the range
+            <datetime> end_date - end of the range
+        Return <list>:
+            months of the shards in ascending order
+        """
+        return [key for key in sorted(self.shards)
+                if self.shards[key][1] < end_date
+                and self.shards[key][2] > start_date]
+
+    def _next_start(self, date):
+        """
+        Find the start of the first reservation starting at a date or later
+        Args:
+            <datetime> date - the earliest start
+        Return <datetime>:
+            start date, None if no reservation starts later
+        """
+        for key in sorted(self.shards):
+            if key >= month_key(date) and self.shards[key][2] > date:
+                later = self._shard(key).between(date, None)
+                if later:
+                    return later[0].start_date
+        return None
+
+    def append(self, reservation):
+        """
+        Add a reservation
+        Args:
+            <ClientReservation> reservation - reservation to add
+        """
+        self.extend([reservation])
+
+    def extend(self, reservations):
+        """
+        Add many reservations at once, every shard is saved once
+        Args:
+            <list> reservations - list of ClientReservation objects
+        """
+        by_month = {}  # new reservations of every shard
+        for reservation in reservations:
+            by_month.setdefault(month_key(reservation.start_date),
+                                []).append(reservation)
+        for key, month_reservations in by_month.items():
+            shard = self._shard(key)
+            shard.extend(month_reservations)
+            self._save(key, shard)
+
+    def remove(self, reservation):
+        """
+        Remove a reservation
+        Args:
+            <ClientReservation> reservation - reservation to remove
+        """
+        key = month_key(reservation.start_date)
+        if key not in self.shards:
+            raise ValueError('reservation is not in the list')
+        shard = self._shard(key)
+        shard.remove(reservation)
+        self._save(key, shard)
+
+    def find(self, name, start_date):
+        """
+        Find the client's reservation starting at a date
+        Args:
+            <string> name - client's name
+            <datetime> start_date - reservation start date
+        Return <ClientReservation>:
+            found reservation or None
+        """
+        key = month_key(start_date)
+        if key not in self.shards:
+            return None
+        return self._shard(key).find(name, start_date)
+
+    def contains(self, name, start_date, end_date):
+        """
+        Check if the reservation is already on the list
+        Args:
+            <string> name - client's name
+            <datetime> start_date - reservation start date
+            <datetime> end_date - reservation end date
+        Return <bool>
+        """
+        key = month_key(start_date)
+        return key in self.shards\
+            and self._shard(key).contains(name, start_date, end_date)
+
+    def week_count(self, name, date):
+        """
+        Count the client's reservations in the week of a date,
+        a week can start in one month and end in the next one
+        Args:
+            <string> name - client's name
+            <datetime> date - any date in the week
+        Return <int>
+        """
+        monday = date - timedelta(days=date.weekday())
+        months = {month_key(monday), month_key(monday + timedelta(days=6))}
+        return sum(self._shard(key).week_count(name, date)
+                   for key in months if key in self.shards)
+
+    def next_free(self, date, minutes):
+        """
+        Find the first free date with a window of the given length
+        Every overlapping shard moves the date past its reservations
+        until all of them leave the window free
+        Args:
+            <datetime> date - the earliest date to check
+            <int> minutes - length of the window
+        Return <datetime>
+        """
+        length = timedelta(minutes=minutes)
+        moved = True
+        while moved:
+            moved = False
+            for key in self._overlapping(date, date + length):
+                free = self._shard(key).next_free(date, minutes)
+                if free != date:
+                    date, moved = free, True
+                    break
+        return date
+
+    def free_window(self, date):
+        """
+        Check if a date is free and how long will be
+        Args:
+            <datetime> date - date provided by the client
+        Return:
+            1)<datetime>
+                first date with at least 0,5h free
+            2)<int>
+                2, 1 or 0 if court will be available for 1,5h, 1h or 0,5h
+        """
+        date = self.next_free(date, 30)
+        next_start = self._next_start(date)
+        if next_start is None:
+            return date, 2
+        return date, window_size(next_start - date, timedelta(minutes=1))
+
+    def free_windows(self, date, minutes, count):
+        """
+        Find the next free windows of at least the given length
+        Args:
+            <datetime> date - the earliest date to check
+            <int> minutes - the shortest window
+            <int> count - the largest number of windows
+        Return <list>:
+            (start, end) dates of every window, end is None
+            when the court is free from start on
+        """
+        windows = []
+        while len(windows) < count:
+            date = self.next_free(date, minutes)
+            next_start = self._next_start(date)
+            windows.append((date, next_start))
+            if next_start is None:
+                break
+            date = next_start
+        return windows
+
+    def between(self, start_date=None, end_date=None):
+        """
+        Return reservations starting in a range of dates
+        Args:
+            <datetime> start_date - the earliest start, None for no limit
+            <datetime> end_date - reservations start before it,
+                None for no limit
+        Return <list>:
+            reservations sorted by start date
+        """
+        reservations = []
+        for key in sorted(self.shards):
+            if start_date is not None and key < month_key(start_date):
+                continue
+            if end_date is not None and key > month_key(end_date):
+                break
+            reservations.extend(self._shard(key).between(start_date,
+                                                         end_date))
+        return reservations
+
+    def first_start(self):
+        """
+        Return the start date of the first reservation
+        Return <datetime>:
+            start date, None if the list is empty
+        """
+        if not self.shards:
+            return None
+        return self.shards[min(self.shards)][1]
+
+    def last_end(self):
+        """
+        Return the end date of the reservation that ends last
+        Return <datetime>:
+            end date, None if the list is empty
+        """
+        return max((last for _, _, last in self.shards.values()),
+                   default=None)
@@ -0,0 +1,166 @@
+"""
+Recruitment Task
+This script saves the schedule in a compact binary file
+which is loaded at startup instead of parsing csv and json files
+Author: Piotr Wołoszyk
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from columnarlist import ColumnarBookingList
+from courtlist import CourtBookingList
+
+SNAPSHOT_NAME = 'schedule.snapshot'  # snapshot file in the schedule folder
+# backup rewritten on every exit, it is not one of the sources
+# because the snapshot is saved together with it
+BACKUP_NAME = 'last_session.csv'
+MAGIC = b'TCSNAP02'  # first bytes of every snapshot
+# magic, number of courts and size of sources
+HEADER = struct.Struct('<8sqq')
+# court, number of reservations, the longest reservation,
+# number of names and size of names, one for every court
+SECTION = struct.Struct('<qqqqq')
+
+
+def file_sources(paths):
+    """
+    Describe files the schedule was loaded from
+    Args:
+        <list> paths - paths to csv and json files
+    Return <bytes>:
+        name, size and modification time of every file
+    """
+    lines = []
+    for path in paths:
+        status = os.stat(path)
+        lines.append(f'{os.path.basename(path)}\t{status.st_size}'
+                     f'\t{status.st_mtime_ns}')
+    return '\n'.join(lines).encode('UTF-8')
+
+
+def _little_endian(column):
+    """
+    Return bytes of an array in little endian order
+    Args:
+        <array> column - array to convert
+    Return <bytes>
+    """
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _court_lists(booking_list):
+    """
+    Split reservations into columnar booking lists of the courts
+    Args:
+        <BookingList> booking_list - reservations to split
+    Return <dict>:
+        ColumnarBookingList of every court by its number
+    """
+    if isinstance(booking_list, CourtBookingList):
+        court_lists = booking_list.courts
+    else:
+        # other booking lists can hold reservations of many courts
+        court_lists = {}
+        for reservation in booking_list:
+            court_lists.setdefault(reservation.court, []).append(reservation)
+    return {court: court_list
+            if isinstance(court_list, ColumnarBookingList)
+            else ColumnarBookingList(court_list, court)
+            for court, court_list in court_lists.items() if len(court_list)}
+
+
+def write_snapshot(path, booking_list, sources):
+    """
+    Save all reservations to a snapshot file
+    Args:
+        <string> path - path to the snapshot
+        <BookingList> booking_list - reservations to save
+        <bytes> sources - description of the files from file_sources()
+    """
+    court_lists = _court_lists(booking_list)
+    with open(f'{path}.tmp', 'wb') as snapshot_file:
+        snapshot_file.write(HEADER.pack(MAGIC, len(court_lists),
+                                        len(sources)))
+        for court, court_list in sorted(court_lists.items()):
+            names = '\0'.join(court_list.names).encode('UTF-8')
+            snapshot_file.write(SECTION.pack(
+                court, len(court_list), court_list.longest,
+                len(court_list.names), len(names)))
+            for column in (court_list.starts, court_list.ends,
+                           court_list.name_ids):
+                snapshot_file.write(_little_endian(column))
+            snapshot_file.write(names)
+        snapshot_file.write(sources)
+    # the old snapshot is replaced only by a complete one
+    os.replace(f'{path}.tmp', path)
+
+
+def read_snapshot(path, sources):
+    """
+    Load reservations from a snapshot file
+    The file is mapped to memory and every column is copied at once
+    Args:
+        <string> path - path to the snapshot
+        <bytes> sources - description of the files from file_sources()
+    Return <CourtBookingList>:
+        saved reservations in a ColumnarBookingList for every court,
+        None when the snapshot is missing, broken
+        or the files changed after it was saved
+    """
+    try:
+        with open(path, 'rb') as snapshot_file,\
+                mmap.mmap(snapshot_file.fileno(), 0,
+                          access=mmap.ACCESS_READ) as data:
+            return _read_columns(data, sources)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def _read_columns(data, sources):
+    """
+    Load reservations from the content of a snapshot file
+    Args:
+        <mmap> data - content of the snapshot
+        <bytes> sources - description of the files from file_sources()
+    Return <CourtBookingList>:
+        saved reservations or None
+    """
+    if len(data) < HEADER.size:
+        return None
+    magic, courts, sources_size = HEADER.unpack_from(data)
+    sources_start = len(data) - sources_size
+    if magic != MAGIC or data[sources_start:] != sources:
+        return None
+    saved = CourtBookingList(
+        lambda court: ColumnarBookingList(court=court))
+    position = HEADER.size
+    with memoryview(data) as view:
+        for _ in range(courts):
+            court, count, longest, names_count, names_size\
+                = SECTION.unpack_from(data, position)
+            position += SECTION.size
+            if position + count * 20 + names_size > sources_start:
+                return None
+            columns = []
+            for typecode, size in (('q', 8), ('q', 8), ('i', 4)):
+                column = array(typecode)
+                column.frombytes(view[position:position + count * size])
+                if sys.byteorder == 'big':
+                    column.byteswap()
+                columns.append(column)
+                position += count * size
+            names = data[position:position + names_size].decode('UTF-8')
+            names = names.split('\0') if names_count else []
+            position += names_size
+            saved.courts[court] = ColumnarBookingList.from_columns(
+                *columns, names, longest, court)
+    if position != sources_start:
+        return None
+    return saved
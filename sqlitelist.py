@@ -0,0 +1,357 @@
+"""
+Recruitment Task
+This script holds a container of the bookings
+which keeps them in an SQLite database
+Author: Piotr Wołoszyk
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from clientreservation import ClientReservation
+from dateformat import from_minutes, to_minutes
+from scheduleindex import window_size
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reservations (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    start_date INTEGER NOT NULL,
+    end_date INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reservations_start_end
+    ON reservations (start_date, end_date);
+CREATE INDEX IF NOT EXISTS reservations_name_start
+    ON reservations (name, start_date);
+CREATE TABLE IF NOT EXISTS longest (minutes INTEGER NOT NULL);
+INSERT INTO longest
+    SELECT COALESCE(MAX(end_date - start_date), 0) FROM reservations
+    WHERE NOT EXISTS (SELECT 1 FROM longest);
+"""
+# the longest reservation ever added, read in every query so
+# reservations added by other programs are covered as well
+LONGEST = '(SELECT minutes FROM longest)'
+
+
+class SqliteBookingList():
+    """
+    Container of the bookings stored in an SQLite database,
+    it has the same methods as BookingList, every query uses an index
+    and the database can be read by many programs at once
+    Every thread uses its own connection to the database file
+    Attributes:
+        path : <string>
+            path to the database file
+        connection : <Connection>
+            connection to the database of the current thread
+        court : <int>
+            number of the court all reservations are made for
+    Methods:
+        append():
+            Add a reservation
+        extend():
+            Add many reservations at once
+        remove():
+            Remove a reservation
+        find():
+            Find the client's reservation starting at a date
+        contains():
+            Check if the reservation is already on the list
+        week_count():
+            Count the client's reservations in the week of a date
+        next_free():
+            Find the first free date with a window of the given length
+        free_window():
+            Check if a date is free and how long will be
+        free_windows():
+            Find the next free windows of at least the given length
+        between():
+            Return reservations starting in a range of dates
+        first_start():
+            Return the start date of the first reservation
+        last_end():
+            Return the end date of the reservation that ends last
+        close():
+            Close the database
+    """
+
+    def __init__(self, path, court=1):
+        self.path = path
+        self.court = court
+        self._local = threading.local()  # connection of every thread
+        self._connections = []  # connections of all threads
+        self._lock = threading.Lock()  # guards _connections
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    @property
+    def connection(self):
+        """
+        Return the connection of the current thread, open it if it is new
+        Return <Connection>
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # closed by close() which may run in another thread
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def __len__(self):
+        return self.connection.execute(
+            'SELECT COUNT(*) FROM reservations').fetchone()[0]
+
+    def __iter__(self):
+        return self._reservations(self.connection.execute(
+            'SELECT name, start_date, end_date FROM reservations'
+            ' ORDER BY start_date, end_date, name'))
+
+    def _reservations(self, rows):
+        """
+        Create reservations from database rows
+        Args:
+            <iterable> rows - (name, start_date, end_date) rows
+        Yield <ClientReservation>
+        """
+        for name, start, end in rows:
+            yield ClientReservation(name, from_minutes(start),
+                                    from_minutes(end), self.court)
+
+    def append(self, reservation):
+        """
+        Add a reservation
+        Args:
+            <ClientReservation> reservation - reservation to add
+        """
+        self.extend([reservation])
+
+    def extend(self, reservations):
+        """
+        Add many reservations at once
+        Args:
+            <list> reservations - list of ClientReservation objects
+        """
+        rows = [(reservation.name,
+                 to_minutes(reservation.start_date),
+                 to_minutes(reservation.end_date))
+                for reservation in reservations]
+        if not rows:
+            return
+        # the longest reservation is updated in the same transaction
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO reservations (name, start_date, end_date)'
+                ' VALUES (?, ?, ?)', rows)
+            self.connection.execute(
+                'UPDATE longest SET minutes = MAX(minutes, ?)',
+                (max(end - start for _, start, end in rows),))
+
+    def remove(self, reservation):
+        """
+        Remove a reservation
+        Args:
+            <ClientReservation> reservation - reservation to remove
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                'DELETE FROM reservations WHERE id = ('
+                ' SELECT id FROM reservations'
+                ' WHERE name = ? AND start_date = ? AND end_date = ?'
+                ' LIMIT 1)',
+                (reservation.name,
+                 to_minutes(reservation.start_date),
+                 to_minutes(reservation.end_date)))
+        if cursor.rowcount == 0:
+            raise ValueError('reservation is not in the list')
+
+    def find(self, name, start_date):
+        """
+        Find the client's reservation starting at a date
+        Args:
+            <string> name - client's name
+            <datetime> start_date - reservation start date
+        Return <ClientReservation>:
+            found reservation or None
+        """
+        rows = self.connection.execute(
+            'SELECT name, start_date, end_date FROM reservations'
+            ' WHERE name = ? AND start_date = ? LIMIT 1',
+            (name, to_minutes(start_date)))
+        return next(self._reservations(rows), None)
+
+    def contains(self, name, start_date, end_date):
+        """
+        Check if the reservation is already on the list
+        Args:
+            <string> name - client's name
+            <datetime> start_date - reservation start date
+            <datetime> end_date - reservation end date
+        Return <bool>
+        """
+        return self.connection.execute(
+            'SELECT 1 FROM reservations'
+            ' WHERE name = ? AND start_date = ? AND end_date = ? LIMIT 1',
+            (name, to_minutes(start_date), to_minutes(end_date))
+        ).fetchone() is not None
+
+    def week_count(self, name, date):
+        """
+        Count the client's reservations in the week of a date
+        Args:
+            <string> name - client's name
+            <datetime> date - any date in the week
+        Return <int>
+        """
+        monday = datetime.combine(
+            date.date() - timedelta(days=date.weekday()), datetime.min.time())
+        return self.connection.execute(
+            'SELECT COUNT(*) FROM reservations'
+            ' WHERE name = ? AND start_date >= ? AND start_date < ?',
+            (name, to_minutes(monday),
+             to_minutes(monday + timedelta(days=7)))).fetchone()[0]
+
+    def _find_free(self, start, length):
+        """
+        Find the first free time with a window of the given length
+        Args:
+            <int> start - the earliest time in minutes
+            <int> length - length of the window in minutes
+        Return:
+            1)<int>
+                first free time in minutes
+            2)<int>
+                start of the next reservation in minutes or None
+        """
+        # only reservations shorter than the longest one can cover the date
+        covered_until = self.connection.execute(
+            'SELECT MAX(end_date) FROM reservations'
+            f' WHERE start_date <= ? AND start_date > ? - {LONGEST}',
+            (start, start)).fetchone()[0]
+        free = start if covered_until is None else max(start, covered_until)
+        rows = self.connection.execute(
+            'SELECT start_date, end_date FROM reservations'
+            ' WHERE start_date > ? ORDER BY start_date', (start,))
+        for next_start, end in rows:
+            if next_start >= free + length:
+                return free, next_start
+            free = max(free, end)
+        return free, None
+
+    def next_free(self, date, minutes):
+        """
+        Find the first free date with a window of the given length
+        Args:
+            <datetime> date - the earliest date to check
+            <int> minutes - length of the window
+        Return <datetime>
+        """
+        start = to_minutes(date)
+        free, _ = self._find_free(start, minutes)
+        if free == start:
+            return date
+        return from_minutes(free)
+
+    def free_window(self, date):
+        """
+        Check if a date is free and how long will be
+        Args:
+            <datetime> date - date provided by the client
+        Return:
+            1)<datetime>
+                first date with at least 0,5h free
+            2)<int>
+                2, 1 or 0 if court will be available for 1,5h, 1h or 0,5h
+        """
+        start = to_minutes(date)
+        free, next_start = self._find_free(start, 30)
+        if free != start:
+            date = from_minutes(free)
+        if next_start is None:
+            return date, 2
+        return date, window_size(next_start - free, 1)
+
+    def free_windows(self, date, minutes, count):
+        """
+        Find the next free windows of at least the given length
+        Args:
+            <datetime> date - the earliest date to check
+            <int> minutes - the shortest window
+            <int> count - the largest number of windows
+        Return <list>:
+            (start, end) dates of every window, end is None
+            when the court is free from start on
+        """
+        start = to_minutes(date)
+        covered_until = self.connection.execute(
+            'SELECT MAX(end_date) FROM reservations'
+            f' WHERE start_date <= ? AND start_date > ? - {LONGEST}',
+            (start, start)).fetchone()[0]
+        free = start if covered_until is None else max(start, covered_until)
+        windows = []
+        rows = self.connection.execute(
+            'SELECT start_date, end_date FROM reservations'
+            ' WHERE start_date > ? ORDER BY start_date', (start,))
+        for next_start, end in rows:
+            if len(windows) == count:
+                break
+            if next_start >= free + minutes:
+                windows.append((from_minutes(free), from_minutes(next_start)))
+            free = max(free, end)
+        else:
+            if len(windows) < count:
+                windows.append((from_minutes(free), None))
+        return windows
+
+    def between(self, start_date=None, end_date=None):
+        """
+        Return reservations starting in a range of dates
+        Args:
+            <datetime> start_date - the earliest start, None for no limit
+            <datetime> end_date - reservations start before it,
+                None for no limit
+        Return <list>:
+            reservations sorted by start date
+        """
+        first = -2 ** 63 if start_date is None else to_minutes(start_date)
+        last = 2 ** 63 - 1 if end_date is None else to_minutes(end_date)
+        return list(self._reservations(self.connection.execute(
+            'SELECT name, start_date, end_date FROM reservations'
+            ' WHERE start_date >= ? AND start_date < ?'
+            ' ORDER BY start_date, end_date, name', (first, last))))
+
+    def first_start(self):
+        """
+        Return the start date of the first reservation
+        Return <datetime>:
+            start date, None if the list is empty
+        """
+        start = self.connection.execute(
+            'SELECT MIN(start_date) FROM reservations').fetchone()[0]
+        return None if start is None else from_minutes(start)
+
+    def last_end(self):
+        """
+        Return the end date of the reservation that ends last
+        Return <datetime>:
+            end date, None if the list is empty
+        """
+        # only reservations shorter than the longest one can end later
+        end = self.connection.execute(
+            'SELECT MAX(end_date) FROM reservations WHERE start_date >='
+            f' (SELECT MAX(start_date) FROM reservations) - {LONGEST}'
+        ).fetchone()[0]
+        return None if end is None else from_minutes(end)
+
+    def close(self):
+        """
+        Close the connections of all threads
+        """
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
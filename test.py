@@ -1,8 +1,26 @@
-from datetime import datetime
+import asyncio
+import io
+import json
+import threading
+from datetime import datetime, time, timedelta
 
+import pytest
+
+import cli
+import main
+import schedule
+from additionalexceptions import BookingError
+from consts import JSON_COMPACT, JSON_LINES
 from reservation import Reservation
+from service import BookingService
 from schedule import Schedule
+from bookinglist import BookingList
 from clientreservation import ClientReservation
+from columnarlist import ColumnarBookingList
+from courtlist import CourtBookingList
+from occupancy import FULL_DAY, slot_times
+from shardlist import court_shards
+from sqlitelist import SqliteBookingList
 from unittest.mock import patch
 
 
@@ -51,6 +69,47 @@ class TestSchedule():
         assert self.sch.date_is_free(date) == (
             datetime.strptime('25.04.2023 16:00', self.date_format), 2)
 
+    def test_next_free_date(self):
+        """
+        Test the next_free_date method
+        """
+
+        # Two reservations one after another
+        for s_time, e_time in (('10:00', '11:00'), ('11:00', '12:30')):
+            self.sch.add_reservation(
+                'Anna N',
+                datetime.strptime(f'05.05.2031 {s_time}', self.date_format),
+                datetime.strptime(f'05.05.2031 {e_time}', self.date_format))
+
+        # There is only 0.5h free before the first reservation
+        date = datetime.strptime('05.05.2031 09:30', self.date_format)
+        # The method return:
+        #   input date for a 0.5h booking
+        #   end of the second reservation for a 1h booking
+        assert self.sch.next_free_date(date, 30) == date
+        assert self.sch.next_free_date(date, 60) == datetime.strptime(
+            '05.05.2031 12:30', self.date_format)
+        # date_is_free skips both reservations at once
+        date = datetime.strptime('05.05.2031 10:30', self.date_format)
+        assert self.sch.date_is_free(date) == (
+            datetime.strptime('05.05.2031 12:30', self.date_format), 2)
+
+    def test_load_csv(self, tmp_path):
+        """
+        Test the load_csv method
+        """
+
+        # The same reservation is twice in the file
+        row = 'Anna N, 06.05.2031 10:00, 06.05.2031 11:00\n'
+        csv_path = tmp_path / 'schedule.csv'
+        csv_path.write_text('name, start_time, end_time\n' + row * 2,
+                            encoding='UTF-8')
+        # The method return:
+        #   1 - the number of skipped duplicates
+        assert self.sch.load_csv(tmp_path) == 1
+        # Loading the file again skips both rows
+        assert self.sch.load_csv(tmp_path) == 2
+
     def test_reservation_exists(self):
         """
         Test reservation_exists method
@@ -60,15 +119,88 @@ class TestSchedule():
         name = 'Piotr W'
         date = datetime.strptime('25.04.2023 15:00', self.date_format)
         # The method return:
-        #   1 - reservation index in the booking_list
-        assert self.sch.reservation_exists(name, date) == 0
+        #   the reservation from the booking_list
+        assert self.sch.reservation_exists(name, date) == ClientReservation(
+            name,
+            date,
+            datetime.strptime('25.04.2023 16:00', self.date_format))
 
         # There are no reservations for this name or for this day
         name = 'Jan kowalski'
         date = datetime.strptime('25.04.2023 17:00', self.date_format)
         # The method return:
-        #   -1 - there is no such index in the booking_list
-        assert self.sch.reservation_exists(name, date) == -1
+        #   None - there is no such reservation in the booking_list
+        assert self.sch.reservation_exists(name, date) is None
+
+    def test_load_folder(self, tmp_path, capsys):
+        """
+        Test the load_folder method
+        """
+
+        # One correct file and one with a wrong date
+        header = 'name, start_time, end_time\n'
+        (tmp_path / 'good.csv').write_text(
+            header + 'Ewa K, 07.05.2031 10:00, 07.05.2031 11:00\n',
+            encoding='UTF-8')
+        (tmp_path / 'bad.csv').write_text(
+            header + 'Ewa K, 31.02.2031 10:00, 31.02.2031 11:00\n',
+            encoding='UTF-8')
+        # A row of a json file which is not an object
+        (tmp_path / 'bad.json').write_text('{"07.05.2031": ["oops"]}',
+                                           encoding='UTF-8')
+        self.sch.load_folder(tmp_path, processes=2)
+        # The wrong files are reported, the correct one is loaded
+        output = capsys.readouterr().out
+        assert 'bad.csv upload failed' in output
+        assert 'bad.json upload failed (TypeError' in output
+        date = datetime.strptime('07.05.2031 10:00', self.date_format)
+        assert self.sch.reservation_exists('Ewa K', date) is not None
+
+    def test_delete_reservation(self):
+        """
+        Test delete_reservation method
+        """
+
+        sch = Schedule(BookingList())
+        date = datetime.strptime('06.05.2031 10:00', self.date_format)
+        sch.add_reservation('Anna N', date, date + timedelta(hours=1))
+        reservation = sch.reservation_exists('Anna N', date)
+        sch.delete_reservation(reservation)
+        # The reservation no longer exists and the court is free
+        assert sch.reservation_exists('Anna N', date) is None
+        assert sch.date_is_free(date) == (date, 2)
+
+    def test_remove_many(self):
+        """
+        Test that removed reservations are left out of the free dates
+        """
+
+        booking_list = BookingList()
+        first = datetime.strptime('05.06.2031 08:00', self.date_format)
+        reservations = [ClientReservation('Jan K',
+                                          first + timedelta(hours=hour),
+                                          first + timedelta(hours=hour + 1))
+                        for hour in range(6)]
+        booking_list.extend(reservations)
+        # Reservations at 9:00 and 11:00 are marked as removed
+        booking_list.remove(reservations[1])
+        booking_list.remove(reservations[3])
+        assert booking_list.free_window(first) == (first.replace(hour=9), 1)
+        assert booking_list.free_windows(first, 60, 3) == [
+            (first.replace(hour=9), first.replace(hour=10)),
+            (first.replace(hour=11), first.replace(hour=12)),
+            (first.replace(hour=14), None)]
+        assert booking_list.between(first.replace(hour=9),
+                                    first.replace(hour=12)) \
+            == [reservations[2]]
+        # The lists are compacted when half of them is removed
+        for reservation in (reservations[0], reservations[5],
+                            reservations[2]):
+            booking_list.remove(reservation)
+        assert len(booking_list.index.starts) == 2
+        assert len(booking_list.index) == 1
+        assert booking_list.first_start() == first.replace(hour=12)
+        assert booking_list.last_end() == first.replace(hour=13)
 
     def test_too_many_reservation(self):
         """
@@ -94,6 +226,561 @@ class TestSchedule():
         date = datetime.strptime('25.04.2023 20:00', self.date_format)
         assert self.sch.too_many_reservation(
             'Piotr W', date) is True
+        # No bookings left for him this week, the next week is empty
+        assert self.sch.bookings_left('Piotr W', date) == 0
+        date = datetime.strptime('01.05.2023 10:00', self.date_format)
+        assert self.sch.bookings_left('Piotr W', date) == 2
+
+    def test_reservations_between(self):
+        """
+        Test reservations_between method
+        """
+
+        # 'Anna N' has two reservations on 05.05.2031 and one the next day
+        sch = Schedule(BookingList())
+        for s_time, e_time in (('05.05.2031 11:00', '05.05.2031 12:30'),
+                               ('05.05.2031 10:00', '05.05.2031 11:00'),
+                               ('06.05.2031 10:00', '06.05.2031 11:00')):
+            sch.add_reservation(
+                'Anna N', datetime.strptime(s_time, self.date_format),
+                datetime.strptime(e_time, self.date_format))
+        day = datetime.strptime('05.05.2031 00:00', self.date_format).date()
+        reservations = sch.reservations_between(day, day)
+        # The method return:
+        #   only reservations from that day sorted by start date
+        assert [reservation.start_date.hour
+                for reservation in reservations] == [10, 11]
+
+    def test_open_journal(self, tmp_path):
+        """
+        Test that changes saved in the journal are replayed
+        """
+
+        path = tmp_path / 'session.journal'
+        sch = Schedule(BookingList())
+        sch.open_journal(path)
+        s_date = datetime.strptime('25.04.2023 15:00', self.date_format)
+        e_date = datetime.strptime('25.04.2023 16:00', self.date_format)
+        sch.add_reservation('Piotr W', s_date, e_date)
+        sch.add_reservation('Anna N', e_date, e_date.replace(hour=17))
+        sch.delete_reservation(sch.reservation_exists('Piotr W', s_date))
+        # The program stops without a backup
+        sch.journal.close()
+        restored = Schedule(BookingList())
+        # The method return:
+        #   3 - number of replayed changes
+        assert restored.open_journal(path) == 3
+        assert list(restored.booking_list) == list(sch.booking_list)
+
+    def test_client_reservation(self):
+        """
+        Test that reservations are hashable and sorted by start date
+        """
+
+        early = ClientReservation(
+            'Piotr W',
+            datetime.strptime('25.04.2023 15:00', self.date_format),
+            datetime.strptime('25.04.2023 16:00', self.date_format))
+        late = ClientReservation(
+            'Anna N',
+            datetime.strptime('25.04.2023 17:00', self.date_format),
+            datetime.strptime('25.04.2023 18:00', self.date_format))
+        assert sorted([late, early]) == [early, late]
+        assert ClientReservation(early.name, early.start_date,
+                                 early.end_date) in {early}
+
+    def test_booking_list_backends(self, tmp_path):
+        """
+        Test the schedule with ColumnarBookingList and SqliteBookingList
+        """
+
+        for booking_list in (ColumnarBookingList(),
+                             SqliteBookingList(tmp_path / 'schedule.db')):
+            sch = Schedule(booking_list)
+            s_date = datetime.strptime('25.04.2023 15:00', self.date_format)
+            e_date = datetime.strptime('25.04.2023 16:00', self.date_format)
+            sch.add_reservation('Piotr W', s_date, e_date)
+            # The same answers as with the default booking list
+            date = datetime.strptime('25.04.2023 14:00', self.date_format)
+            assert sch.date_is_free(date) == (date, 1)
+            assert sch.date_is_free(s_date) == (e_date, 2)
+            assert sch.bookings_left('Piotr W', date) == 1
+            assert sch.first_and_last_date() == (s_date.date(),
+                                                 e_date.date())
+            reservation = sch.reservation_exists('Piotr W', s_date)
+            assert reservation == ClientReservation('Piotr W', s_date, e_date)
+            sch.delete_reservation(reservation)
+            assert sch.is_empty()
+
+    def test_sqlite_two_connections(self, tmp_path):
+        """
+        Test that a booking added by another program is seen as taken
+        """
+
+        first = Schedule(SqliteBookingList(tmp_path / 'schedule.db'))
+        second = Schedule(SqliteBookingList(tmp_path / 'schedule.db'))
+        s_date = datetime.strptime('12.05.2031 10:00', self.date_format)
+        second.add_reservation('Jan K', s_date, s_date.replace(hour=13),
+                               quiet=True)
+        date = s_date.replace(hour=11)
+        assert first.date_is_free(date) == (s_date.replace(hour=13), 2)
+        with pytest.raises(BookingError):
+            first.book('Ewa K', date, 60)
+        # Another thread books with its own connection
+        thread = threading.Thread(
+            target=first.book, args=('Ewa K', s_date.replace(hour=14), 60))
+        thread.start()
+        thread.join()
+        assert second.reservation_exists('Ewa K', s_date.replace(hour=14))
+        first.booking_list.close()
+        second.booking_list.close()
+
+    def test_load_snapshot(self, tmp_path, capsys):
+        """
+        Test that load_folder uses the snapshot until a file changes
+        """
+
+        csv_path = tmp_path / 'schedule.csv'
+        csv_path.write_text(
+            'name, start_time, end_time\n'
+            'Ewa K, 08.05.2031 10:00, 08.05.2031 11:00\n', encoding='UTF-8')
+        first = Schedule(BookingList())
+        first.load_folder(tmp_path)
+        # The second load reads the snapshot with the same reservations
+        second = Schedule(BookingList())
+        second.load_folder(tmp_path)
+        assert 'schedule.snapshot' in capsys.readouterr().out
+        assert list(second.booking_list) == list(first.booking_list)
+
+        # A changed file makes the snapshot stale
+        with open(csv_path, 'a', encoding='UTF-8') as file:
+            file.write('Ewa K, 09.05.2031 10:00, 09.05.2031 11:00\n')
+        third = Schedule(BookingList())
+        third.load_folder(tmp_path)
+        assert 'schedule.snapshot' not in capsys.readouterr().out
+        assert len(third.booking_list) == 2
+
+    def test_backup_snapshot(self, tmp_path, monkeypatch, capsys):
+        """
+        Test that the snapshot saved with the backup is loaded next time
+        """
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'schedule').mkdir()
+        (tmp_path / 'schedule' / 'club.csv').write_text(
+            'name, start_time, end_time\n'
+            'Ewa K, 08.05.2031 10:00, 08.05.2031 11:00\n', encoding='UTF-8')
+        sch = Schedule(BookingList())
+        sch.load_folder('schedule')
+        s_date = datetime.strptime('09.05.2031 10:00', self.date_format)
+        sch.add_reservation('Jan K', s_date, s_date.replace(hour=11))
+        sch.make_backup()
+        capsys.readouterr()
+        # The rewritten backup does not make the snapshot stale
+        restored = Schedule(BookingList())
+        restored.load_folder('schedule')
+        assert capsys.readouterr().out == 'Found: schedule/schedule.snapshot\n'
+        assert sorted(restored.booking_list) == sorted(sch.booking_list)
+
+    def test_compact_journal(self, tmp_path, monkeypatch):
+        """
+        Test that a cancellation survives the backup and a changed file
+        """
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'schedule').mkdir()
+        club = tmp_path / 'schedule' / 'club.csv'
+        club.write_text('name, start_time, end_time\n'
+                        'Ewa K, 08.05.2031 10:00, 08.05.2031 11:00\n',
+                        encoding='UTF-8')
+        sch = Schedule(BookingList())
+        sch.load_folder('schedule')
+        sch.open_journal('schedule/session.journal')
+        s_date = datetime.strptime('08.05.2031 10:00', self.date_format)
+        sch.delete_reservation(sch.reservation_exists('Ewa K', s_date))
+        sch.make_backup()
+        sch.journal.close()
+        # Another booking in the file makes the snapshot stale
+        with open(club, 'a', encoding='UTF-8') as file:
+            file.write('Jan K, 09.05.2031 10:00, 09.05.2031 11:00\n')
+        restored = Schedule(BookingList())
+        restored.load_folder('schedule')
+        restored.open_journal('schedule/session.journal')
+        assert restored.reservation_exists('Ewa K', s_date) is None
+        assert len(restored.booking_list) == 1
+        restored.journal.close()
+
+    def test_full_journal(self, tmp_path, monkeypatch):
+        """
+        Test that a full journal is compacted with the backup saved
+        next to it when no folder was loaded
+        """
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'club').mkdir()
+        sch = Schedule(BookingList())
+        sch.open_journal(tmp_path / 'club' / 'session.journal')
+        sch.journal.compact_every = 2
+        s_date = datetime.strptime('09.05.2031 10:00', self.date_format)
+        sch.add_reservation('Jan K', s_date, s_date.replace(hour=11))
+        sch.add_reservation('Ewa K', s_date.replace(hour=12),
+                            s_date.replace(hour=13))
+        assert len(sch.booking_list) == 2
+        assert (tmp_path / 'club' / 'last_session.csv').exists()
+        assert sch.journal.records == 0
+        sch.journal.close()
+
+    def test_start_loading(self, tmp_path, capsys):
+        """
+        Test that methods wait for the schedule loaded in the background
+        """
+
+        (tmp_path / 'schedule.csv').write_text(
+            'name, start_time, end_time\n'
+            'Ewa K, 08.05.2031 10:00, 08.05.2031 11:00\n', encoding='UTF-8')
+        (tmp_path / 'session.journal').write_text(
+            '+,Jan K,09.05.2031 10:00,09.05.2031 11:00\n',
+            encoding='UTF-8')
+        sch = Schedule(BookingList())
+        sch.start_loading(tmp_path, tmp_path / 'session.journal')
+        date = datetime.strptime('08.05.2031 10:00', self.date_format)
+        assert sch.reservation_exists('Ewa K', date) is not None
+        assert len(sch.booking_list) == 2
+        assert sch.loader is None
+        # Messages about the files are shown by the first call
+        assert 'schedule.csv' in capsys.readouterr().out
+        sch.journal.close()
+
+    def test_loading_failed(self, tmp_path):
+        """
+        Test that every call raises the error which stopped loading
+        """
+        sch = Schedule(BookingList())
+        # a folder can not be opened as the journal
+        sch.start_loading(tmp_path, tmp_path)
+        date = datetime.strptime('08.05.2031 10:00', self.date_format)
+        with pytest.raises(OSError):
+            sch.reservation_exists('Ewa K', date)
+        with pytest.raises(OSError):
+            sch.reservation_exists('Ewa K', date)
+
+    def test_menu_loading_failed(self, tmp_path, monkeypatch, capsys):
+        """
+        Test that the menu reports the error which stopped loading
+        and exits without a backup
+        """
+        # a folder can not be opened as the journal
+        (tmp_path / 'schedule' / 'session.journal').mkdir(parents=True)
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr('builtins.input', lambda _: '5')
+        with pytest.raises(SystemExit) as exit_info:
+            main.main()
+        assert exit_info.value.code == 1
+        assert 'could not be loaded' in capsys.readouterr().out
+        assert not (tmp_path / 'schedule' / 'last_session.csv').exists()
+
+    def test_month_shards(self, tmp_path):
+        """
+        Test that queries load only the months they need
+        """
+
+        sch = Schedule(court_shards(tmp_path, cache_size=2))
+        for month in range(1, 7):
+            start = datetime(2031, month, 2, 10)
+            sch.add_reservation('Anna N', start, start + timedelta(hours=1))
+        # A reservation at the end of May ending in June
+        s_date = datetime.strptime('31.05.2031 23:30', self.date_format)
+        sch.add_reservation('Ewa K', s_date, s_date + timedelta(hours=1))
+        shards = sch.booking_list.court_list(1)
+        assert len(shards.loaded) == 2
+        # A new schedule reads the saved months
+        sch = Schedule(court_shards(tmp_path, cache_size=2))
+        shards = sch.booking_list.court_list(1)
+        assert len(sch.booking_list) == 7 and not shards.loaded
+        assert sch.date_is_free(datetime(2031, 6, 1))[0] ==\
+            datetime(2031, 6, 1, 0, 30)
+        assert sch.next_free_date(s_date, 30) == s_date + timedelta(hours=1)
+        assert sorted(shards.loaded) == [(2031, 5), (2031, 6)]
+        # The week of 2 March starts in February, May and June are dropped
+        assert not sch.too_many_reservation('Anna N', datetime(2031, 3, 2))
+        assert sorted(shards.loaded) == [(2031, 2), (2031, 3)]
+        assert len(sch.reservations_between(datetime(2031, 2, 1).date(),
+                                            datetime(2031, 3, 31).date())) == 2
+
+    def test_courts(self, tmp_path, capsys):
+        """
+        Test a schedule of a club with two courts
+        """
+
+        sch = Schedule(CourtBookingList(), courts=2)
+        s_date = datetime.strptime('11.05.2031 10:00', self.date_format)
+        e_date = datetime.strptime('11.05.2031 11:00', self.date_format)
+        sch.add_reservation('Anna N', s_date, e_date)
+        # The second court is still free
+        assert sch.free_court(s_date) == 2
+        sch.add_reservation('Ewa K', s_date, e_date, 2)
+        assert sch.free_court(s_date) is None
+        assert sch.longest_free_court(s_date) is None
+        assert sch.longest_free_court(e_date) == 1
+        # The first court is free for 1h, the second one for 1,5h
+        sch.add_reservation('Jan K', e_date + timedelta(hours=1),
+                            e_date + timedelta(hours=2))
+        assert sch.free_court(e_date) == 1
+        assert sch.longest_free_court(e_date) == 2
+        assert sch.date_is_free(s_date, 2) == (e_date, 2)
+        assert sch.reservation_exists('Ewa K', s_date).court == 2
+
+        # Courts are saved in the csv file and loaded back
+        sch.save_csv(s_date.date(), s_date.date(), tmp_path / 'club')
+        for _ in range(2):
+            # the second time from the snapshot
+            loaded = Schedule(CourtBookingList())
+            loaded.load_folder(tmp_path)
+            assert loaded.courts == 2
+            assert loaded.booking_list.between() == sch.booking_list.between()
+        assert 'schedule.snapshot' in capsys.readouterr().out
+        # The columns of the snapshot are used as the court lists
+        assert isinstance(loaded.booking_list.court_list(2),
+                          ColumnarBookingList)
+        loaded.delete_reservation(loaded.reservation_exists('Ewa K', s_date))
+        assert loaded.date_is_free(s_date, 2) == (s_date, 2)
+
+    def test_court_duplicates(self, tmp_path):
+        """
+        Test that bookings of the second court are found as duplicates
+        and cancelled by the journal
+        """
+
+        (tmp_path / 'club.csv').write_text(
+            'name, start_time, end_time, court\n'
+            'Ewa K, 12.05.2031 10:00, 12.05.2031 11:00, 2\n',
+            encoding='UTF-8')
+        sch = Schedule(CourtBookingList(), courts=2)
+        assert sch.load_file(tmp_path / 'club.csv') == 0
+        assert sch.load_file(tmp_path / 'club.csv') == 1
+        assert len(sch.booking_list) == 1
+        s_date = datetime.strptime('12.05.2031 10:00', self.date_format)
+        e_date = datetime.strptime('12.05.2031 11:00', self.date_format)
+        assert not sch.new_booking('Ewa K', s_date, e_date)
+
+        # The cancellation is replayed from the journal
+        sch.open_journal(tmp_path / 'session.journal')
+        sch.delete_reservation(sch.reservation_exists('Ewa K', s_date))
+        sch.journal.close()
+        restored = Schedule(CourtBookingList(), courts=2)
+        restored.load_file(tmp_path / 'club.csv')
+        restored.open_journal(tmp_path / 'session.journal')
+        assert len(restored.booking_list) == 0
+        restored.journal.close()
+
+    def test_free_windows(self, tmp_path):
+        """
+        Test the free_windows method with every booking list
+        """
+
+        for booking_list in (BookingList(), ColumnarBookingList(),
+                             SqliteBookingList(tmp_path / 'schedule.db')):
+            sch = Schedule(booking_list)
+            for s_time, e_time in (('10:00', '11:00'), ('11:00', '12:30'),
+                                   ('13:00', '14:00'), ('15:00', '16:00')):
+                sch.add_reservation(
+                    'Ewa K',
+                    datetime.strptime(f'13.05.2031 {s_time}',
+                                      self.date_format),
+                    datetime.strptime(f'13.05.2031 {e_time}',
+                                      self.date_format))
+            date = datetime.strptime('13.05.2031 09:00', self.date_format)
+            # The method return:
+            #   (start, end) of free windows, None when always free after
+            windows = [(start.strftime('%H:%M'),
+                        end and end.strftime('%H:%M'))
+                       for start, end in sch.free_windows(date, 60, 3)]
+            assert windows == [('09:00', '10:00'), ('14:00', '15:00'),
+                               ('16:00', None)]
+            # The half-hour gap is found when 30 minutes are enough
+            windows = sch.free_windows(date, 30, 2)
+            assert windows[1][0].strftime('%H:%M') == '12:30'
+
+    def test_availability(self):
+        """
+        Test the week_availability and month_availability methods
+        """
+
+        sch = Schedule(BookingList())
+        s_date = datetime.strptime('15.05.2031 10:00', self.date_format)
+        sch.add_reservation('Anna N', s_date, s_date.replace(hour=11))
+        week = sch.week_availability(s_date)
+        # The method return:
+        #   seven days from Monday with bitmaps of free slots
+        assert [day.day for day, _ in week] == list(range(12, 19))
+        assert slot_times(FULL_DAY & ~week[3][1]) == [
+            time(10, 0), time(10, 30)]
+
+        # Slots are updated when reservations are added and deleted
+        sch.add_reservation('Ewa K', s_date.replace(minute=30),
+                            s_date.replace(hour=11, minute=15))
+        sch.delete_reservation(sch.reservation_exists('Anna N', s_date))
+        month = sch.month_availability(2031, 5)
+        assert len(month) == 31
+        assert slot_times(FULL_DAY & ~month[14][1]) == [
+            time(10, 30), time(11, 0)]
+
+    def test_book_threads(self):
+        """
+        Test that threads booking the same dates do not book a court twice
+        """
+
+        sch = Schedule(CourtBookingList(), courts=2)
+        first = datetime.strptime('19.05.2031 08:00', self.date_format)
+        dates = [first + timedelta(minutes=30 * slot) for slot in range(20)]
+        booked = []  # reservations made by all threads
+
+        def client(name):
+            for date in dates:
+                try:
+                    booked.append(sch.book(name, date, 60))
+                except BookingError:
+                    pass
+
+        names = ['Anna N', 'Ewa K', 'Jan K', 'Ola M', 'Piotr W', 'Adam B']
+        threads = [threading.Thread(target=client, args=(name,))
+                   for name in names]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Nothing is lost and no court is booked twice at the same time
+        assert sorted(booked) == sch.booking_list.between()
+        for court in (1, 2):
+            reservations = sch.booking_list.court_list(court).between()
+            assert all(earlier.end_date <= later.start_date
+                       for earlier, later
+                       in zip(reservations, reservations[1:]))
+        # The weekly limit holds for every client
+        assert all(sch.bookings_left(name, first) == 0 for name in names)
+
+    def test_book_many(self):
+        """
+        Test the book_many method
+        """
+
+        sch = Schedule(CourtBookingList(), courts=2)
+        first = datetime.strptime('19.05.2031 10:00', self.date_format)
+        sch.add_reservation('Ola M', first + timedelta(days=14), first
+                            + timedelta(days=14, minutes=60), court=1)
+        # A season of weekly bookings, one moves to the second court
+        season = sch.book_many(Schedule.recurring('Anna N', first, 60, 4))
+        assert [reservation.court for reservation in season] == [1, 1, 2, 1]
+        assert len(sch.booking_list) == 5
+        # Requests are checked against each other, nothing is booked
+        # when one of them can not be
+        results = sch.book_many([
+            ('Ewa K', first.replace(hour=12), 90, 1),
+            ('Jan K', first.replace(hour=13), 60, 1),
+            ('Ewa K', first.replace(hour=14), 30),
+            ('Ewa K', first.replace(hour=16), 30)])
+        assert results[1] == 'The time you chose is unavailable'
+        assert results[3] == ('You have exceeded your booking limit'
+                              ' for this week')
+        assert isinstance(results[0], ClientReservation)
+        assert len(sch.booking_list) == 5
+        assert sch.date_is_free(first.replace(hour=12))\
+            == (first.replace(hour=12), 2)
+        # Wrong requests get a message as well
+        results = sch.book_many([('Jan K', first.replace(hour=12)),
+                                 ('Jan K', first.replace(hour=14), 45),
+                                 ('Jan K', first.replace(hour=16), 30, 3)])
+        assert results == ['minutes must be one of (30, 60, 90)',
+                           'minutes must be one of (30, 60, 90)',
+                           'There is no such court']
+
+    def test_print_cache(self, tmp_path, capsys):
+        """
+        Test that a printed day is formatted again only after a change
+        """
+
+        sch = Schedule(BookingList())
+        s_date = datetime.strptime('12.05.2031 10:00', self.date_format)
+        for day in range(3):
+            start = s_date + timedelta(days=day)
+            sch.add_reservation('Anna N', start, start + timedelta(hours=1),
+                                quiet=True)
+        week = (s_date.date(), s_date.date() + timedelta(days=6))
+        sch.print_schedule_output(*week)
+        printed = capsys.readouterr().out
+        with patch.object(Schedule, '_render_day') as render_day:
+            sch.print_schedule_output(*week)
+            render_day.assert_not_called()
+        assert capsys.readouterr().out == printed
+        # Only the changed day is formatted again
+        sch.add_reservation('Ewa K', s_date.replace(hour=12),
+                            s_date.replace(hour=13), quiet=True)
+        with patch.object(Schedule, '_render_day',
+                          wraps=Schedule._render_day) as render_day:
+            sch.print_schedule_output(*week)
+            assert render_day.call_count == 1
+        assert '\t*Ewa K 12.05.2031 12:00 - 12.05.2031 13:00\n' in\
+            capsys.readouterr().out
+        # A replayed journal record changes only its own day
+        (tmp_path / 'session.journal').write_text(
+            '+,Jan K,13.05.2031 15:00,13.05.2031 16:00\n', encoding='UTF-8')
+        sch.open_journal(tmp_path / 'session.journal')
+        sch.journal.close()
+        with patch.object(Schedule, '_render_day',
+                          wraps=Schedule._render_day) as render_day:
+            sch.print_schedule_output(*week)
+            assert render_day.call_count == 1
+
+    def test_save_csv(self, tmp_path):
+        """
+        Test the save_csv method
+        """
+
+        sch = Schedule(BookingList())
+        s_date = datetime.strptime('10.05.2031 10:00', self.date_format)
+        e_date = datetime.strptime('10.05.2031 11:30', self.date_format)
+        # A name with a comma is quoted like by csv.writer
+        sch.add_reservation('Kowalski, Jan', s_date, e_date)
+        sch.add_reservation('Ewa K', e_date, e_date.replace(hour=12))
+        sch.save_csv(s_date.date(), s_date.date(), tmp_path / 'schedule')
+        assert (tmp_path / 'schedule.csv').read_bytes() == (
+            b'Name, start_time, end_time\r\n'
+            b'"Kowalski, Jan", 10.05.2031 10:00, 10.05.2031 11:30\r\n'
+            b'Ewa K, 10.05.2031 11:30, 10.05.2031 12:30\r\n')
+
+    def test_save_json(self, tmp_path, monkeypatch):
+        """
+        Test the save_json method in all json formats
+        """
+
+        # Reservations are read one day at a time
+        monkeypatch.setattr(schedule, 'CHUNK_DAYS', 1)
+        sch = Schedule(BookingList())
+        for day, name in (('10', 'Ewa K'), ('10', 'Anna N'), ('12', 'Ewa K')):
+            sch.add_reservation(
+                name,
+                datetime.strptime(f'{day}.05.2031 10:00', self.date_format),
+                datetime.strptime(f'{day}.05.2031 11:00', self.date_format))
+        day = datetime.strptime('10.05.2031 00:00', self.date_format).date()
+        end = day.replace(day=20)
+        expected = {'10.05.2031': [
+            {'name': 'Anna N', 'start_time': '10:00', 'end_time': '11:00'},
+            {'name': 'Ewa K', 'start_time': '10:00', 'end_time': '11:00'}],
+            '12.05.2031': [
+            {'name': 'Ewa K', 'start_time': '10:00', 'end_time': '11:00'}]}
+        # The indented file is the same as written by json.dump
+        sch.save_json(day, end, tmp_path / 'indented')
+        assert (tmp_path / 'indented.json').read_text(encoding='UTF-8') ==\
+            json.dumps(expected, ensure_ascii=False, indent=4)
+        sch.save_json(day, end, tmp_path / 'compact', JSON_COMPACT)
+        assert json.loads((tmp_path / 'compact.json').read_text(
+            encoding='UTF-8')) == expected
+        # One line for every reservation
+        sch.save_json(day, end, tmp_path / 'lines', JSON_LINES)
+        lines = (tmp_path / 'lines.ndjson').read_text(
+            encoding='UTF-8').splitlines()
+        assert [json.loads(line)['date'] for line in lines] == [
+            '10.05.2031', '10.05.2031', '12.05.2031']
 
 
 class TestReservation():
@@ -148,6 +835,22 @@ class TestReservation():
         #   None
         assert self.res.valid_date_time(input_date) is None
 
+    def test_make_reservation_taken(self, capsys):
+        """
+        Test that the next free times are shown when the client
+        does not want the suggested date
+        """
+
+        res = Reservation(Schedule(BookingList()))
+        res.sch.add_reservation(
+            'Anna N',
+            datetime.strptime('14.05.2031 10:00', self.date_format),
+            datetime.strptime('14.05.2031 11:00', self.date_format))
+        user_input = ['Ewa K', '14.05.2031 10:30', 'no']
+        with patch('builtins.input', side_effect=user_input):
+            res.make_reservation()
+        assert '\t*from 14.05.2031 11:00\n' in capsys.readouterr().out
+
     def test_valid_name(self):
 
         # Name is correct
@@ -161,3 +864,172 @@ class TestReservation():
         # the method return:
         #   None
         assert self.res.valid_name(input_name) is None
+
+
+class TestBookingService():
+    """
+    service.BookingService tests against localhost
+    """
+
+    @staticmethod
+    async def request(port, *requests):
+        """
+        Send requests in one connection and return the answers
+        """
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        answers = []
+        for request in requests:
+            writer.write(json.dumps(request).encode('UTF-8') + b'\n')
+            await writer.drain()
+            answers.append(json.loads(await reader.readline()))
+        writer.close()
+        await writer.wait_closed()
+        return answers
+
+    def test_concurrent_make(self):
+        """
+        Test that concurrent clients can not book the same court twice
+        """
+
+        async def scenario():
+            service = BookingService(Schedule(CourtBookingList(), courts=2))
+            port = await service.start(port=0)
+            names = ['Anna N', 'Ewa K', 'Jan K', 'Ola M', 'Piotr W']
+            make = {'op': 'make', 'start': '16.05.2031 10:00',
+                    'minutes': 60}
+            answers = await asyncio.gather(*(
+                self.request(port, {**make, 'name': name})
+                for name in names))
+            # Only two clients get a court, one on each
+            booked = sorted(answer[0]['court'] for answer in answers
+                            if answer[0]['ok'])
+            assert booked == [1, 2]
+            day = {'start': '16.05.2031', 'end': '16.05.2031'}
+            listed, exported, wrong = await self.request(
+                port, {'op': 'list', **day},
+                {'op': 'export', 'format': 'csv', **day},
+                {'op': 'dance'})
+            assert len(listed['reservations']) == 2
+            assert exported['data'].startswith(
+                'Name, start_time, end_time, court\r\n')
+            assert wrong['ok'] is False
+            await service.close()
+
+        asyncio.run(scenario())
+
+    def test_name_not_string(self):
+        """
+        Test that a name which is not a string is a bad request
+        """
+
+        service = BookingService(Schedule(CourtBookingList()))
+        for op in ('make', 'cancel'):
+            for name in (None, 7):
+                answer = asyncio.run(service.handle(
+                    {'op': op, 'name': name, 'start': '16.05.2031 10:00'}))
+                assert answer == {'ok': False,
+                                  'error': 'The name must be a string'}
+
+    def test_export_thread(self):
+        """
+        Test that an export is formatted outside of the event loop
+        """
+
+        sch = Schedule(CourtBookingList())
+        threads = []  # threads which read the reservations
+        reservations_between = sch.reservations_between
+
+        def between(*args):
+            threads.append(threading.get_ident())
+            return reservations_between(*args)
+
+        sch.reservations_between = between
+        service = BookingService(sch)
+        answer = asyncio.run(service.handle(
+            {'op': 'export', 'start': '16.05.2031', 'end': '17.05.2031'}))
+        assert answer['ok']
+        assert threads and threading.get_ident() not in threads
+
+
+class TestCli():
+    """
+    cli.main tests
+    """
+
+    def test_commands(self, tmp_path, monkeypatch, capsys):
+        """
+        Test commands and a batch run without the menu
+        """
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'schedule').mkdir()
+        with patch('cli.Schedule', lambda: Schedule(CourtBookingList())):
+            assert cli.main(['book', 'Anna N', '20.05.2031 10:00',
+                             '--minutes', '90']) == 0
+            # The booking is kept in the backup for the next command
+            assert cli.main(['book', 'Ewa K', '20.05.2031 11:00']) == 1
+            assert 'unavailable' in capsys.readouterr().err
+            monkeypatch.setattr('sys.stdin', io.StringIO(
+                'book, Ewa K, 20.05.2031 11:30, 30\n'
+                'cancel, Anna N, 20.05.2031 10:00\n'
+                'dance, Ewa K\n'))
+            assert cli.main(['batch', '--format', 'csv']) == 1
+            answers = [json.loads(line)
+                       for line in capsys.readouterr().out.splitlines()]
+            assert [answer['ok'] for answer in answers] == [
+                True, True, False]
+            assert cli.main(['export', '20.05.2031', '20.05.2031']) == 0
+            assert capsys.readouterr().out == (
+                'Name, start_time, end_time\r\n'
+                'Ewa K, 20.05.2031 11:30, 20.05.2031 12:00\r\n')
+
+    def test_wrong_arguments(self, tmp_path, monkeypatch, capsys):
+        """
+        Test that wrong arguments end with a message and an error status
+        """
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'schedule').mkdir()
+        with patch('cli.Schedule', lambda: Schedule(CourtBookingList())):
+            assert cli.main(['free-slots', 'garbage']) == 1
+            assert capsys.readouterr().err.startswith('! time data')
+            assert cli.main(['import', 'nope.csv']) == 1
+            output = capsys.readouterr()
+            assert 'nope.csv upload failed' in output.err
+            assert output.out == ''
+
+    def test_batch_not_object(self, tmp_path, monkeypatch, capsys):
+        """
+        Test that a json line which is not an object is a bad request
+        """
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'schedule').mkdir()
+        monkeypatch.setattr('sys.stdin', io.StringIO('"x"\n[1]\n'))
+        with patch('cli.Schedule', lambda: Schedule(CourtBookingList())):
+            assert cli.main(['batch']) == 1
+        answers = [json.loads(line)
+                   for line in capsys.readouterr().out.splitlines()]
+        assert [answer['error'] for answer in answers] == [
+            'bad request: expected an object, got str',
+            'bad request: expected an object, got list']
+
+    def test_cancel_source_file(self, tmp_path, monkeypatch, capsys):
+        """
+        Test that a booking loaded from a source file stays cancelled
+        """
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'schedule').mkdir()
+        (tmp_path / 'schedule' / 'club.csv').write_text(
+            'name, start_time, end_time\n'
+            'Anna Nowak, 20.05.2031 10:00, 20.05.2031 11:00\n',
+            encoding='UTF-8')
+        with patch('cli.Schedule', lambda: Schedule(CourtBookingList())):
+            assert cli.main(['cancel', 'Anna Nowak', '20.05.2031 10:00']) == 0
+            capsys.readouterr()
+            assert cli.main(['export', '20.05.2031', '20.05.2031']) == 0
+            assert capsys.readouterr().out == 'Name, start_time, end_time\r\n'
+            # Loading messages go to stderr
+            assert cli.main(['book', 'Ewa Kot', '21.05.2031 10:00']) == 0
+            assert 'Found' not in capsys.readouterr().out